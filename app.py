@@ -1,15 +1,13 @@
 from PyQt5.QtWidgets import QStackedWidget, QMessageBox
 from gui.login_window import LoginWindow
-from core.database import Database
+from core.database import get_database, release_user_database
 
 
 class VacancyAnalyzerApp:
     def __init__(self):
         self.stacked_widget = QStackedWidget()
         self.current_user = None
-        self.database = Database()
-
-        self.database.create_tables()
+        self.database = get_database()
 
         self.login_window = LoginWindow(self)
         self.main_window = None
@@ -46,6 +44,10 @@ class VacancyAnalyzerApp:
             self.stacked_widget.setCurrentWidget(self.login_window)
 
     def logout(self):
+        if self.main_window:
+            self.main_window.collection_ui.stop_workers()
+        if self.current_user:
+            release_user_database(self.current_user.id)
         self.current_user = None
         self.stacked_widget.setCurrentWidget(self.login_window)
 
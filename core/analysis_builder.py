@@ -0,0 +1,92 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from core.models import Analysis, AnalysisSkill, Vacancy, VacancySkill
+
+
+class AnalysisBuilder:
+    PROGRESS_EVERY = 5000
+
+    def __init__(self, user_db, user_id, template=None, on_progress=None, stop_check=None):
+        self.user_db = user_db
+        self.user_id = user_id
+        self.template = template
+        self.on_progress = on_progress
+        self.stop_check = stop_check
+
+    def build(self):
+        session = self.user_db.get_session()
+        try:
+            vacancy_count = session.query(Vacancy).count()
+            total = session.execute(select(func.count()).select_from(VacancySkill)).scalar()
+            skill_stats = defaultdict(lambda: {
+                'count': 0,
+                'min_salaries': [],
+                'max_salaries': [],
+                'avg_salaries': []
+            })
+
+            rows = session.execute(
+                select(VacancySkill.skill_id, Vacancy.salary_min, Vacancy.salary_max)
+                .join(Vacancy, Vacancy.id == VacancySkill.vacancy_id)
+                .execution_options(yield_per=self.PROGRESS_EVERY)
+            )
+            for done, (skill_id, salary_min, salary_max) in enumerate(rows, 1):
+                stats = skill_stats[skill_id]
+                stats['count'] += 1
+
+                if salary_min:
+                    stats['min_salaries'].append(salary_min)
+                if salary_max:
+                    stats['max_salaries'].append(salary_max)
+                if salary_min and salary_max:
+                    stats['avg_salaries'].append((salary_min + salary_max) / 2)
+
+                if done % self.PROGRESS_EVERY == 0:
+                    if self.is_stopped():
+                        return None
+                    self.progress(done, total)
+            if self.is_stopped():
+                return None
+            self.progress(total, total)
+
+            analysis = Analysis(
+                user_id=self.user_id,
+                name=f"Анализ от {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                template=self.template,
+                created_at=datetime.now(),
+                total_vacancies=vacancy_count
+            )
+            session.add(analysis)
+            session.flush()
+
+            session.add_all(
+                AnalysisSkill(
+                    analysis_id=analysis.id,
+                    skill_id=skill_id,
+                    vacancy_count=data['count'],
+                    frequency=(data['count'] / vacancy_count) * 100,
+                    min_salary=min(data['min_salaries']) if data['min_salaries'] else None,
+                    max_salary=max(data['max_salaries']) if data['max_salaries'] else None,
+                    avg_salary=sum(data['avg_salaries']) / len(data['avg_salaries']) if data['avg_salaries'] else None
+                )
+                for skill_id, data in skill_stats.items()
+            )
+            session.commit()
+            return analysis.id
+
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+            self.user_db.Session.remove()
+
+    def is_stopped(self):
+        return bool(self.stop_check and self.stop_check())
+
+    def progress(self, done, total):
+        if self.on_progress:
+            self.on_progress({'stage': 'Подсчет навыков', 'done': done, 'total': total})
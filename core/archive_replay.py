@@ -0,0 +1,98 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core.connectors import CONNECTORS
+from core.payload_archive import PayloadArchive
+from core.vacancy_index import VacancyIndex
+from core.vacancy_writer import VacancyWriter
+
+
+_connectors = None
+
+
+def build_records(lines):
+    global _connectors
+    if _connectors is None:
+        _connectors = {source: connector_class() for source, connector_class in CONNECTORS.items()}
+
+    records = []
+    skipped = 0
+    for entry in PayloadArchive.decode(lines):
+        connector = _connectors.get(entry.get('source'))
+        if not connector:
+            continue
+
+        try:
+            record = connector.record_from_archive(entry)
+        except Exception:
+            skipped += 1
+            continue
+        if record:
+            records.append(VacancyWriter.prepare(record))
+    return len(lines), skipped, records
+
+
+class ArchiveReplay:
+    def __init__(self, db, archive_path, batch_size=2000, workers=None, chunk_lines=1000, on_message=None):
+        self.db = db
+        self.archive_path = archive_path
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_lines = chunk_lines
+        self.on_message = on_message or print
+        self.entries_count = 0
+        self.skipped_count = 0
+        self.write_seconds = 0.0
+
+    def parsed_batches(self):
+        batches = PayloadArchive.read_batches(self.archive_path, self.chunk_lines)
+        if self.workers == 1:
+            for lines in batches:
+                yield build_records(lines)
+            return
+
+        # Порядок пакетов сохраняется, чтобы при повторах url побеждала первая запись архива;
+        # число пакетов в работе ограничено, чтобы не читать весь архив в память.
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = deque()
+            for lines in batches:
+                futures.append(pool.submit(build_records, lines))
+                if len(futures) >= self.workers * 2:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+
+    def run(self):
+        session = self.db.get_session()
+        writer = VacancyWriter(session, self.batch_size)
+        added = 0
+        try:
+            vacancy_index = VacancyIndex.load(session)
+            batch = []
+            for lines_count, skipped, records in self.parsed_batches():
+                self.entries_count += lines_count
+                self.skipped_count += skipped
+                for record in records:
+                    vacancy_url = record['vacancy']['url']
+                    if vacancy_url in vacancy_index:
+                        continue
+                    vacancy_index.add(vacancy_url)
+                    batch.append(record)
+
+                if len(batch) >= self.batch_size:
+                    added += self.write(writer, batch)
+                    batch = []
+            added += self.write(writer, batch)
+        finally:
+            self.write_seconds = writer.write_seconds
+            session.close()
+        return added
+
+    def write(self, writer, batch):
+        if not batch:
+            return 0
+        writer.write(batch)
+        count = len(writer.commit())
+        self.on_message(f"Прочитано записей архива: {self.entries_count}, восстановлено вакансий: +{count}")
+        return count
@@ -0,0 +1,19 @@
+from core.connectors.base import RefreshResult, SourceConnector
+from core.connectors.hh import HHConnector
+from core.connectors.superjob import SuperJobConnector
+from core.constants import VacancySource
+
+
+CONNECTORS = {
+    VacancySource.HH: HHConnector,
+    VacancySource.SUPERJOB: SuperJobConnector
+}
+
+
+def create_connectors(sources, **options):
+    connectors = []
+    for source in sources:
+        connector_class = CONNECTORS.get(source)
+        if connector_class:
+            connectors.append(connector_class(**options.get(source, {})))
+    return connectors
@@ -0,0 +1,98 @@
+import requests
+
+from core.http_client import ApiHttpClient
+from core.rate_limiter import AdaptiveRateLimiter
+
+
+class RefreshResult:
+    FETCHED = 'fetched'
+    UNCHANGED = 'unchanged'
+    ARCHIVED = 'archived'
+
+
+class SourceConnector:
+    source = None
+    title = None
+    search_cap = 2000
+    per_page = 100
+    needs_details = False
+    supports_refresh = False
+
+    def __init__(self, rate_limiter=None, http_client=None, pool_size=12):
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.http = http_client or ApiHttpClient(pool_size=pool_size)
+        self.stop_check = lambda: False
+        self.on_message = print
+        self.on_error = lambda kind: None
+        self.archive = None
+
+    def bind(self, stop_check, on_message, on_error=None, archive=None):
+        self.stop_check = stop_check
+        self.on_message = on_message
+        self.on_error = on_error or (lambda kind: None)
+        self.archive = archive
+
+    def log(self, message):
+        self.on_message(f"[{self.title}] {message}")
+
+    def is_available(self):
+        return True
+
+    def state_key(self, query):
+        return f"{self.source}|{query}"
+
+    def api_get(self, url, timeout, attempts=3, params=None, headers=None):
+        response = None
+        for attempt in range(attempts):
+            if not self.rate_limiter.acquire(self.stop_check):
+                return response
+
+            try:
+                response = self.http.get(url, params=params, headers=headers, timeout=timeout)
+            except requests.exceptions.RequestException:
+                self.rate_limiter.on_rejection('network')
+                if attempt == attempts - 1:
+                    raise
+                continue
+
+            self.rate_limiter.on_response(response)
+            if not self.rate_limiter.is_rejection(response.status_code):
+                return response
+
+        return response
+
+    def search(self, crawl_slice, page, per_page=None):
+        raise NotImplementedError
+
+    def count_found(self, crawl_slice):
+        try:
+            data = self.search(crawl_slice, 0, per_page=1)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.on_error('network' if isinstance(e, requests.exceptions.RequestException) else 'parse')
+            self.log(f"Ошибка оценки запроса «{crawl_slice.query}»: {str(e)}")
+            return None
+        return data['found'] if data else None
+
+    def item_url(self, item):
+        raise NotImplementedError
+
+    def fetch_details(self, item):
+        return item
+
+    def build_record(self, item, details):
+        raise NotImplementedError
+
+    def refresh(self, vacancy_url):
+        raise NotImplementedError
+
+    def archive_payload(self, kind, url, payload):
+        if self.archive:
+            self.archive.write(self.source, kind, url, payload)
+
+    def record_from_archive(self, entry):
+        if self.needs_details or entry['kind'] != 'item':
+            return None
+        return self.build_record(entry['payload'], entry['payload'])
+
+    def stats_message(self):
+        return f"[{self.title}] {self.rate_limiter.stats_message()}"
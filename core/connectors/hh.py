@@ -0,0 +1,198 @@
+from datetime import datetime
+
+from core.connectors.base import RefreshResult, SourceConnector
+from core.constants import VacancySource
+from core.vacancy_index import VacancyIndex
+
+
+class HHConnector(SourceConnector):
+    source = VacancySource.HH
+    title = 'hh.ru'
+    search_cap = 2000
+    per_page = 100
+    needs_details = True
+    supports_refresh = True
+
+    API_URL = 'https://api.hh.ru'
+
+    def __init__(self, rate_limiter=None, http_client=None, pool_size=12, api_url=API_URL,
+                 detail_cache=None, area=1):
+        super().__init__(rate_limiter, http_client, pool_size)
+        self.api_url = api_url.rstrip('/')
+        self.detail_cache = detail_cache
+        self.area = area
+
+    def state_key(self, query):
+        return query
+
+    def search(self, crawl_slice, page, per_page=None):
+        params = crawl_slice.search_params()
+        params.update({'area': self.area, 'page': page, 'per_page': per_page or self.per_page})
+
+        response = self.api_get(f"{self.api_url}/vacancies", timeout=10, params=params)
+        if response is None:
+            return None
+
+        if response.status_code != 200:
+            self.on_error('api')
+            self.log(f"Ошибка API: {response.status_code}")
+            return None
+
+        data = response.json()
+        return {
+            'found': data.get('found', 0),
+            'pages': data.get('pages', 1),
+            'items': data.get('items', []) or []
+        }
+
+    def item_url(self, item):
+        return item.get('url')
+
+    def detail_url(self, vacancy_url):
+        if 'hh.ru/vacancy/' in vacancy_url:
+            vacancy_id = vacancy_url.split('/')[-1].split('?')[0]
+            return f"{self.api_url}/vacancies/{vacancy_id}"
+        return vacancy_url
+
+    def fetch_details(self, item):
+        try:
+            vacancy_url = self.detail_url(item['url'])
+            cache_key = str(VacancyIndex.key(vacancy_url))
+            cached = self.detail_cache.get(cache_key) if self.detail_cache else None
+            if cached and cached.is_fresh:
+                return self.parse_details(cached.payload)
+
+            headers = cached.conditional_headers() if cached else None
+            response = self.api_get(vacancy_url, timeout=(3.05, 10), headers=headers)
+            if response is None:
+                return None
+
+            if response.status_code == 304 and cached:
+                self.detail_cache.revalidate(cache_key)
+                return self.parse_details(cached.payload)
+
+            if not response.ok:
+                return None
+
+            data = response.json()
+
+            if not data or not isinstance(data, dict):
+                return None
+
+            self.cache_response(cache_key, data, response)
+            self.archive_payload('detail', item['url'], data)
+            return self.parse_details(data)
+
+        except Exception:
+            self.on_error('details')
+            return None
+
+    def refresh(self, vacancy_url):
+        try:
+            api_url = self.detail_url(vacancy_url)
+            cache_key = str(VacancyIndex.key(api_url))
+            cached = self.detail_cache.get(cache_key) if self.detail_cache else None
+
+            headers = cached.conditional_headers() if cached else None
+            response = self.api_get(api_url, timeout=(3.05, 10), headers=headers)
+            if response is None:
+                return None
+
+            if response.status_code == 304 and cached:
+                self.detail_cache.revalidate(cache_key)
+                return RefreshResult.UNCHANGED, None
+
+            if response.status_code in (404, 410):
+                return RefreshResult.ARCHIVED, None
+
+            if not response.ok:
+                return None
+
+            data = response.json()
+            if not data or not isinstance(data, dict):
+                return None
+
+            self.cache_response(cache_key, data, response)
+            self.archive_payload('detail', vacancy_url, data)
+            if data.get('archived'):
+                return RefreshResult.ARCHIVED, None
+
+            item = dict(data, url=vacancy_url)
+            return RefreshResult.FETCHED, self.build_record(item, self.parse_details(data))
+
+        except Exception:
+            self.on_error('details')
+            return None
+
+    def record_from_archive(self, entry):
+        if entry['kind'] != 'detail' or entry['payload'].get('archived'):
+            return None
+        data = entry['payload']
+        return self.build_record(dict(data, url=entry['url']), self.parse_details(data))
+
+    def cache_response(self, cache_key, data, response):
+        if self.detail_cache:
+            self.detail_cache.put(
+                cache_key, data,
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified')
+            )
+
+    @staticmethod
+    def parse_details(data):
+        return {
+            'description': (data.get('description') or '')[:15000],
+            'key_skills': data.get('key_skills', []) or []
+        }
+
+    def build_record(self, item, details):
+        employer = item.get('employer', {}) or {}
+        company_name = employer.get('name') or "Не указана"
+
+        salary = item.get('salary', {}) or {}
+
+        published_at = item.get('published_at')
+        try:
+            publish_date = datetime.strptime(published_at,
+                                             '%Y-%m-%dT%H:%M:%S%z') if published_at else datetime.now()
+        except:
+            publish_date = datetime.now()
+        area = item.get('area', {}) or {}
+
+        employment_type = None
+        employment = item.get('employment', {}) or {}
+        if employment:
+            employment_type = employment.get('name')
+
+        skills = []
+        for skill in details.get('key_skills', []):
+            if not isinstance(skill, dict):
+                continue
+
+            skill_name = skill.get('name')
+            if skill_name and skill_name not in skills:
+                skills.append(skill_name)
+
+        return {
+            'company': company_name,
+            'skills': skills,
+            'vacancy': {
+                'title': item.get('name', 'Без названия'),
+                'description': details.get('description', ''),
+                'url': item['url'],
+                'published_date': publish_date.date(),
+                'source': self.source,
+                'salary_min': salary.get('from'),
+                'salary_max': salary.get('to'),
+                'salary_currency': salary.get('currency'),
+                'is_remote': (item.get('schedule', {}) or {}).get('id') == 'remote',
+                'city': area.get('name'),
+                'employment_type': employment_type
+            }
+        }
+
+    def stats_message(self):
+        message = super().stats_message()
+        if self.detail_cache:
+            message += f"; {self.detail_cache.stats_message()}"
+        return message
@@ -0,0 +1,94 @@
+import os
+from datetime import datetime
+
+from core.connectors.base import SourceConnector
+from core.constants import EmploymentType, VacancySource
+
+
+class SuperJobConnector(SourceConnector):
+    source = VacancySource.SUPERJOB
+    title = 'SuperJob'
+    search_cap = 500
+    per_page = 100
+
+    API_URL = 'https://api.superjob.ru/2.0'
+    API_KEY_ENV = 'SUPERJOB_API_KEY'
+    EMPLOYMENT_TYPES = {
+        6: EmploymentType.FULL,
+        10: EmploymentType.PART,
+        12: EmploymentType.PART,
+        13: EmploymentType.PART,
+        7: EmploymentType.INTERN,
+        9: EmploymentType.PROJECT
+    }
+    REMOTE_PLACE = 2
+
+    def __init__(self, rate_limiter=None, http_client=None, pool_size=4, api_url=API_URL,
+                 api_key=None, town=4):
+        super().__init__(rate_limiter, http_client, pool_size)
+        self.api_url = api_url.rstrip('/')
+        self.api_key = api_key or os.environ.get(self.API_KEY_ENV)
+        self.town = town
+
+    def is_available(self):
+        return bool(self.api_key)
+
+    def search(self, crawl_slice, page, per_page=None):
+        per_page = per_page or self.per_page
+        params = {'keyword': crawl_slice.query, 'town': self.town, 'page': page, 'count': per_page}
+        if crawl_slice.date_from:
+            params['date_published_from'] = int(crawl_slice.date_from.timestamp())
+        if crawl_slice.date_to:
+            params['date_published_to'] = int(crawl_slice.date_to.timestamp())
+
+        response = self.api_get(f"{self.api_url}/vacancies/", timeout=10, params=params,
+                                headers={'X-Api-App-Id': self.api_key})
+        if response is None:
+            return None
+
+        if response.status_code != 200:
+            self.on_error('api')
+            self.log(f"Ошибка API: {response.status_code}")
+            return None
+
+        data = response.json()
+        found = data.get('total', 0)
+        reachable = min(found, self.search_cap)
+        return {
+            'found': found,
+            'pages': max(1, -(-reachable // per_page)),
+            'items': data.get('objects', []) or []
+        }
+
+    def item_url(self, item):
+        return item.get('link')
+
+    def build_record(self, item, details):
+        published_at = item.get('date_published')
+        publish_date = datetime.fromtimestamp(published_at) if published_at else datetime.now()
+
+        currency = (item.get('currency') or '').upper() or None
+        if currency == 'RUB':
+            currency = 'RUR'
+
+        type_of_work = item.get('type_of_work', {}) or {}
+        place_of_work = item.get('place_of_work', {}) or {}
+        town = item.get('town', {}) or {}
+
+        return {
+            'company': item.get('firm_name') or "Не указана",
+            'skills': [],
+            'vacancy': {
+                'title': item.get('profession') or 'Без названия',
+                'description': (item.get('vacancyRichText') or item.get('candidat') or '')[:15000],
+                'url': item['link'],
+                'published_date': publish_date.date(),
+                'source': self.source,
+                'salary_min': item.get('payment_from') or None,
+                'salary_max': item.get('payment_to') or None,
+                'salary_currency': currency,
+                'is_remote': place_of_work.get('id') == self.REMOTE_PLACE,
+                'city': town.get('title'),
+                'employment_type': self.EMPLOYMENT_TYPES.get(type_of_work.get('id'), type_of_work.get('title'))
+            }
+        }
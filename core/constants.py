@@ -4,3 +4,9 @@ class EmploymentType:
     PROJECT = 'Проектная работа'
     INTERN = 'Интерн'
     REMOTE = 'remote'
+
+
+class VacancySource:
+    HH = 'hh.ru'
+    SUPERJOB = 'superjob.ru'
+    RABOTA = 'rabota.ru'
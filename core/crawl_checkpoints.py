@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from sqlalchemy import null
+from core.crawl_planner import CrawlSlice, QueryPlan
+from core.models import CrawlCheckpoint, CrawlState
+
+
+class CrawlCheckpointStore:
+    def __init__(self, session, max_age=timedelta(days=1)):
+        self.session = session
+        self.max_age = max_age
+
+    def restore_plan(self, query, key=None, source=None):
+        key = key or query
+        checkpoints = self.session.query(CrawlCheckpoint) \
+            .filter_by(query=key) \
+            .order_by(CrawlCheckpoint.date_from) \
+            .all()
+        if not checkpoints:
+            return None
+
+        updated_at = max(checkpoint.updated_at or datetime.min for checkpoint in checkpoints)
+        if datetime.now() - updated_at > self.max_age:
+            self.clear(key)
+            return None
+
+        failed = checkpoints[0].query_found is None or any(checkpoint.found is None for checkpoint in checkpoints)
+        if failed and all(checkpoint.is_done for checkpoint in checkpoints):
+            # План с неоцененными окнами уже пройден: строим его заново от прежней отметки.
+            self.clear(key)
+            return None
+
+        slices = []
+        for checkpoint in checkpoints:
+            crawl_slice = CrawlSlice(query, checkpoint.date_from, checkpoint.date_to, checkpoint.found)
+            crawl_slice.start_page = (-1 if checkpoint.last_page is None else checkpoint.last_page) + 1
+            crawl_slice.done = bool(checkpoint.is_done)
+            crawl_slice.checkpoint_id = checkpoint.id
+            slices.append(crawl_slice)
+
+        plan = QueryPlan(query, checkpoints[0].query_found, slices, source, key, failed)
+        plan.received = sum(checkpoint.received or 0 for checkpoint in checkpoints)
+        return plan
+
+    def save_plan(self, plan):
+        for crawl_slice in plan.slices:
+            # Неизвестное число вакансий пишем явным NULL, иначе сработает значение столбца по умолчанию.
+            checkpoint = CrawlCheckpoint(
+                query=plan.key,
+                query_found=null() if plan.found is None else plan.found,
+                date_from=crawl_slice.date_from,
+                date_to=crawl_slice.date_to,
+                found=null() if crawl_slice.found is None else crawl_slice.found
+            )
+            self.session.add(checkpoint)
+            self.session.flush()
+            crawl_slice.checkpoint_id = checkpoint.id
+
+    def update(self, crawl_slice, page, pages, received, added):
+        checkpoint = self.session.get(CrawlCheckpoint, crawl_slice.checkpoint_id)
+        if not checkpoint:
+            return
+
+        checkpoint.last_page = page
+        checkpoint.pages = pages
+        checkpoint.received = (checkpoint.received or 0) + received
+        checkpoint.added = (checkpoint.added or 0) + added
+
+    def mark_done(self, crawl_slice):
+        crawl_slice.done = True
+        checkpoint = self.session.get(CrawlCheckpoint, crawl_slice.checkpoint_id)
+        if checkpoint:
+            checkpoint.is_done = True
+
+    def clear(self, query):
+        self.session.query(CrawlCheckpoint).filter_by(query=query).delete()
+
+    def get_state(self, query):
+        state = self.session.query(CrawlState).filter_by(query=query).first()
+        if not state:
+            state = CrawlState(query=query)
+            self.session.add(state)
+        return state
+
+    def incremental_start(self, query, overlap, max_period):
+        state = self.session.query(CrawlState).filter_by(query=query).first()
+        if not state or not state.high_water_mark:
+            return None
+
+        date_from = state.high_water_mark - overlap
+        if datetime.now() - date_from > max_period:
+            return None
+        return date_from.replace(microsecond=0)
+
+    def begin(self, query, planned_at):
+        self.get_state(query).pending_mark = planned_at
+
+    def complete(self, query):
+        state = self.get_state(query)
+        if state.pending_mark:
+            state.high_water_mark = state.pending_mark
+        state.pending_mark = None
+        state.last_success_at = datetime.now()
+        self.clear(query)
@@ -0,0 +1,119 @@
+import math
+from datetime import datetime, timedelta
+
+
+class CrawlSlice:
+    def __init__(self, query, date_from=None, date_to=None, found=0):
+        self.query = query
+        self.date_from = date_from
+        self.date_to = date_to
+        self.found = found
+        self.start_page = 0
+        self.done = False
+        self.checkpoint_id = None
+
+    def search_params(self):
+        params = {'text': self.query}
+        if self.date_from:
+            params['date_from'] = self.date_from.strftime('%Y-%m-%dT%H:%M:%S')
+        if self.date_to:
+            params['date_to'] = self.date_to.strftime('%Y-%m-%dT%H:%M:%S')
+        return params
+
+    def label(self):
+        if not self.date_from and not self.date_to:
+            return self.query
+        date_from = self.date_from.strftime('%d.%m %H:%M') if self.date_from else '...'
+        date_to = self.date_to.strftime('%d.%m %H:%M') if self.date_to else '...'
+        return f"{self.query} [{date_from} - {date_to}]"
+
+
+class QueryPlan:
+    def __init__(self, query, found, slices, source=None, key=None, failed=False):
+        self.query = query
+        self.found = found
+        self.slices = slices
+        self.source = source
+        self.key = key or query
+        self.failed = failed
+        self.received = 0
+
+    def pending_slices(self):
+        return [crawl_slice for crawl_slice in self.slices if not crawl_slice.done]
+
+    def is_complete(self):
+        return all(crawl_slice.done for crawl_slice in self.slices)
+
+    def coverage(self):
+        if not self.found:
+            return 1.0
+        return min(1.0, self.received / self.found)
+
+    def coverage_message(self):
+        source = f" ({self.source})" if self.source else ""
+        if self.failed:
+            found = "?" if self.found is None else self.found
+            return (f"Запрос «{self.query}»{source}: получено {self.received} из {found}, "
+                    f"срезов: {len(self.slices)}; не удалось оценить число вакансий, период будет собран повторно")
+        return (f"Запрос «{self.query}»{source}: получено {self.received} из {self.found} "
+                f"({self.coverage() * 100:.1f}%), срезов: {len(self.slices)}")
+
+
+class CrawlPlanner:
+    SEARCH_CAP = 2000
+
+    def __init__(self, count_found, cap=SEARCH_CAP, period_days=30, min_window=timedelta(hours=1),
+                 source=None, key=None):
+        self.count_found = count_found
+        self.source = source
+        self.key = key or (lambda query: query)
+        self.cap = cap
+        self.period_days = period_days
+        self.min_window = min_window
+
+    def plan(self, query, now=None, date_from=None):
+        total = self.count_found(CrawlSlice(query, date_from))
+        if total is None:
+            return QueryPlan(query, None, [], self.source, self.key(query), failed=True)
+        if total <= self.cap:
+            slices = [CrawlSlice(query, date_from, found=total)] if total else []
+            return QueryPlan(query, total, slices, self.source, self.key(query))
+
+        date_to = (now or datetime.now()).replace(microsecond=0)
+        if date_from is None:
+            date_from = date_to - timedelta(days=self.period_days)
+
+        slices = []
+        for window in self.split(CrawlSlice(query, date_from, date_to, total)):
+            slices.extend(self.refine(window))
+        slices.sort(key=lambda s: s.date_from)
+        failed = any(crawl_slice.found is None for crawl_slice in slices)
+        return QueryPlan(query, total, slices, self.source, self.key(query), failed)
+
+    def refine(self, crawl_slice):
+        crawl_slice.found = self.count_found(crawl_slice)
+        if crawl_slice.found is None:
+            # Окно с неизвестным числом вакансий не выбрасываем: собираем его целиком, а план считаем неполным.
+            return [crawl_slice]
+        if crawl_slice.found <= self.cap or crawl_slice.date_to - crawl_slice.date_from <= self.min_window:
+            return [crawl_slice] if crawl_slice.found else []
+
+        slices = []
+        for window in self.split(crawl_slice):
+            slices.extend(self.refine(window))
+        return slices
+
+    def split(self, crawl_slice):
+        # Целимся в ~80% лимита на срез, чтобы неравномерная плотность публикаций
+        # не требовала лишнего уровня деления.
+        parts = max(2, math.ceil(crawl_slice.found / (self.cap * 0.8)))
+        step = (crawl_slice.date_to - crawl_slice.date_from) / parts
+        step = max(step, self.min_window)
+
+        windows = []
+        start = crawl_slice.date_from
+        while start < crawl_slice.date_to:
+            end = min(crawl_slice.date_to, (start + step).replace(microsecond=0))
+            windows.append(CrawlSlice(crawl_slice.query, start, end))
+            start = end
+        return windows
@@ -0,0 +1,126 @@
+import threading
+import time
+
+
+class CrawlProgress:
+    ERROR_LABELS = {
+        'details': 'детали',
+        'invalid': 'некорректные',
+        'api': 'API',
+        'network': 'сеть',
+        'parse': 'JSON',
+        'db': 'БД'
+    }
+    STAGE_LABELS = {
+        'plan': 'Планирование',
+        'crawl': 'Сбор',
+        'refresh': 'Проверка обновлений',
+        'done': 'Завершено'
+    }
+
+    def __init__(self, on_progress=None, interval=0.5):
+        self.on_progress = on_progress
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.published_at = 0.0
+        self.stage = 'plan'
+        self.found = 0
+        self.received = 0
+        self.initial_received = 0
+        self.pages = 0
+        self.added = 0
+        self.skipped = 0
+        self.errors = {}
+        self.rate_limiters = []
+
+    def start(self, found, received):
+        with self.lock:
+            self.stage = 'crawl'
+            self.found = found
+            self.received = received
+            self.initial_received = received
+            self.started_at = time.monotonic()
+        self.publish(force=True)
+
+    def set_stage(self, stage):
+        with self.lock:
+            self.stage = stage
+        self.publish(force=True)
+
+    def page(self, received, added):
+        with self.lock:
+            self.pages += 1
+            self.received += received
+            self.added += added
+            self.skipped += received - added
+        self.publish()
+
+    def error(self, kind):
+        with self.lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+        self.publish()
+
+    def snapshot(self):
+        with self.lock:
+            elapsed = time.monotonic() - self.started_at
+            received = self.received - self.initial_received
+            rate = received / elapsed if elapsed > 0 else 0.0
+            remaining = max(0, self.found - self.received)
+            event = {
+                'stage': self.stage,
+                'found': self.found,
+                'received': self.received,
+                'pages': self.pages,
+                'added': self.added,
+                'skipped': self.skipped,
+                'elapsed': elapsed,
+                'rate': rate,
+                'eta': remaining / rate if rate > 0 and self.stage == 'crawl' else None,
+                'errors': dict(self.errors)
+            }
+
+        rejections = 0
+        request_rate = 0.0
+        for rate_limiter in self.rate_limiters:
+            stats = rate_limiter.stats()
+            request_rate += stats['rate']
+            rejections += sum(stats['rejections'].values())
+        event['request_rate'] = request_rate
+        event['rejections'] = rejections
+        return event
+
+    def publish(self, force=False):
+        if not self.on_progress:
+            return
+
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.published_at < self.interval:
+                return
+            self.published_at = now
+        self.on_progress(self.snapshot())
+
+    @classmethod
+    def message(cls, event):
+        text = (f"{cls.STAGE_LABELS.get(event['stage'], event['stage'])}: "
+                f"получено {event['received']} из {event['found']}, добавлено {event['added']}, "
+                f"уже в базе {event['skipped']}, {event['rate']:.1f} вак/с, "
+                f"лимит {event['request_rate']:.1f} запр/с")
+        if event['eta'] is not None:
+            text += f", осталось ~{cls.format_duration(event['eta'])}"
+        errors = ", ".join(f"{cls.ERROR_LABELS.get(kind, kind)}: {count}"
+                           for kind, count in sorted(event['errors'].items()))
+        if errors or event['rejections']:
+            text += f". Ошибки: {errors or 'нет'}, отказов API: {event['rejections']}"
+        return text
+
+    @staticmethod
+    def format_duration(seconds):
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return f"{hours} ч {minutes} мин"
+        if minutes:
+            return f"{minutes} мин {seconds} с"
+        return f"{seconds} с"
@@ -0,0 +1,372 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import queue
+
+import requests
+
+from core.database import get_database
+from core.models import Template, TemplateVacancy
+from core.crawl_planner import CrawlPlanner
+from core.crawl_checkpoints import CrawlCheckpointStore
+from core.crawl_progress import CrawlProgress
+from core.vacancy_index import VacancyIndex
+from core.vacancy_writer import VacancyWriter
+from core.connectors import HHConnector, RefreshResult
+
+
+def load_template_queries(db):
+    session = db.get_session()
+    try:
+        search_queries = []
+        for template in session.query(Template).all():
+            vacancies = session.query(TemplateVacancy).filter_by(template_id=template.id).all()
+            for vac in vacancies:
+                if vac.vacancy_query not in search_queries:
+                    search_queries.append(vac.vacancy_query)
+        return search_queries
+    finally:
+        session.close()
+
+
+class Crawler:
+    def __init__(self, db, search_queries, connectors, max_workers=8, max_slices=4,
+                 commit_every=500, commit_interval=5.0, incremental=True, overlap=timedelta(hours=1),
+                 on_message=None, refresh_limit=200, refresh_age=timedelta(days=1),
+                 on_progress=None, progress_interval=0.5, archive=None):
+        self.db = db or get_database()
+        self.search_queries = search_queries
+        self.max_workers = max(1, max_workers)
+        self.max_slices = max(1, max_slices)
+        self.commit_every = max(1, commit_every)
+        self.commit_interval = commit_interval
+        self.vacancy_index = None
+        self.write_seconds = 0.0
+        self.incremental = incremental
+        self.overlap = overlap
+        self.refresh_limit = refresh_limit
+        self.refresh_age = refresh_age
+        self.on_message = on_message or print
+        self.progress = CrawlProgress(on_progress, progress_interval)
+        self.archive = archive
+        self.stop_flag = False
+
+        self.connectors = {}
+        for connector in connectors:
+            if not connector.is_available():
+                self.log(f"Источник {connector.title} пропущен: не настроен доступ к API")
+                continue
+            connector.bind(lambda: self.stop_flag, self.log, self.progress.error, archive)
+            self.connectors[connector.source] = connector
+        self.progress.rate_limiters = [connector.rate_limiter for connector in self.connectors.values()]
+
+    def log(self, message):
+        self.on_message(message)
+
+    def select_new_items(self, connector, items):
+        items_by_url = {}
+        for item in items:
+            if not item or not isinstance(item, dict):
+                self.progress.error('invalid')
+                continue
+
+            vacancy_url = connector.item_url(item)
+            if not vacancy_url:
+                self.progress.error('invalid')
+                continue
+
+            items_by_url.setdefault(vacancy_url, item)
+
+        new_urls = self.vacancy_index.filter_new(items_by_url.keys())
+        return [items_by_url[url] for url in new_urls]
+
+    def fetch_details(self, connector, executor, items):
+        if not connector.needs_details:
+            return items
+
+        def fetch(item):
+            if self.stop_flag:
+                return None
+            return connector.fetch_details(item)
+
+        return list(executor.map(fetch, items))
+
+    def build_record(self, connector, item, details):
+        try:
+            if not details:
+                if not self.stop_flag:
+                    self.progress.error('details')
+                return None
+
+            return connector.build_record(item, details)
+
+        except Exception:
+            self.progress.error('invalid')
+            return None
+
+    def crawl_slice(self, plan, crawl_slice, pages_queue):
+        connector = self.connectors[plan.source]
+        page = crawl_slice.start_page
+        pages = page + 1
+        try:
+            while not self.stop_flag and page < pages:
+                data = connector.search(crawl_slice, page)
+                if not data:
+                    break
+
+                pages = data['pages']
+                self.put_page(pages_queue, (plan, crawl_slice, page, pages, data['items']))
+                page += 1
+
+        except requests.exceptions.RequestException as e:
+            self.progress.error('network')
+            self.log(f"Ошибка сети: {str(e)}")
+        except ValueError as e:
+            self.progress.error('parse')
+            self.log(f"Ошибка парсинга JSON: {str(e)}")
+        except Exception as e:
+            self.progress.error('invalid')
+            self.log(f"Ошибка обработки среза {crawl_slice.label()}: {str(e)}")
+        finally:
+            self.put_page(pages_queue, (plan, crawl_slice, page, pages, None))
+
+    def put_page(self, pages_queue, message):
+        while not self.stop_flag:
+            try:
+                pages_queue.put(message, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def store_page(self, writer, executor, connector, items):
+        if self.archive:
+            self.archive.write_many(connector.source, 'item', [
+                (connector.item_url(item), item) for item in items if isinstance(item, dict)
+            ])
+
+        new_items = self.select_new_items(connector, items)
+        details = self.fetch_details(connector, executor, new_items)
+
+        records = []
+        for item, item_details in zip(new_items, details):
+            if self.stop_flag:
+                break
+
+            record = self.build_record(connector, item, item_details)
+            if record:
+                records.append(record)
+
+        return writer.write(records)
+
+    def prepare_plans(self, checkpoints, slice_executors):
+        plans = {}
+        planned_at = datetime.now().replace(microsecond=0)
+        futures = []
+        for source, connector in self.connectors.items():
+            planner = CrawlPlanner(connector.count_found, connector.search_cap,
+                                   source=source, key=connector.state_key)
+            max_period = timedelta(days=planner.period_days)
+
+            for query in self.search_queries:
+                key = connector.state_key(query)
+                plan = checkpoints.restore_plan(query, key, source)
+                if plan:
+                    plans[key] = plan
+                    self.log(
+                        f"Возобновление сбора «{query}» ({source}): осталось срезов {len(plan.pending_slices())} "
+                        f"из {len(plan.slices)}, уже получено {plan.received}"
+                    )
+                    continue
+
+                date_from = None
+                if self.incremental:
+                    date_from = checkpoints.incremental_start(key, self.overlap, max_period)
+                    if date_from:
+                        self.log(
+                            f"Инкрементальный сбор «{query}» ({source}) с {date_from.strftime('%d.%m.%Y %H:%M')}"
+                        )
+
+                futures.append(slice_executors[source].submit(planner.plan, query, planned_at, date_from))
+
+        for future in futures:
+            plan = future.result()
+            checkpoints.save_plan(plan)
+            checkpoints.begin(plan.key, planned_at)
+            plans[plan.key] = plan
+
+        return [plans[connector.state_key(query)]
+                for connector in self.connectors.values() for query in self.search_queries]
+
+    def refresh_vacancies(self, writer, executor):
+        sources = [source for source, connector in self.connectors.items() if connector.supports_refresh]
+        if not sources or self.refresh_limit <= 0 or self.stop_flag:
+            return
+
+        candidates = writer.select_stale(sources, self.refresh_limit, datetime.now() - self.refresh_age)
+        if not candidates:
+            return
+        self.log(f"Проверка обновлений: {len(candidates)} вакансий")
+        self.progress.set_stage('refresh')
+
+        def check(candidate):
+            if self.stop_flag:
+                return None
+            return self.connectors[candidate.source].refresh(candidate.url)
+
+        updated = {}
+        unchanged = []
+        archived = []
+        for candidate, result in zip(candidates, executor.map(check, candidates)):
+            if not result:
+                continue
+
+            status, record = result
+            if status == RefreshResult.ARCHIVED:
+                archived.append(candidate.id)
+            elif status == RefreshResult.FETCHED and writer.content_hash(record) != candidate.content_hash:
+                updated[candidate.id] = record
+            else:
+                unchanged.append(candidate.id)
+
+        try:
+            writer.update(updated)
+            writer.mark_checked(unchanged)
+            writer.mark_checked(archived, archived=True)
+        except Exception as e:
+            self.discard_batch(writer)
+            self.progress.error('db')
+            self.log(f"Ошибка обновления вакансий: {str(e)}")
+            return
+
+        self.log(
+            f"Проверено вакансий: {len(updated) + len(unchanged) + len(archived)} из {len(candidates)}. "
+            f"Обновлено: {len(updated)}, без изменений: {len(unchanged)}, в архиве: {len(archived)}"
+        )
+
+    def commit_batch(self, writer, force=False):
+        try:
+            committed_urls = writer.commit() if force else writer.commit_if_due()
+        except Exception as e:
+            self.discard_batch(writer)
+            self.progress.error('db')
+            self.log(f"Ошибка сохранения данных: {str(e)}")
+            return 0
+        return len(committed_urls)
+
+    def discard_batch(self, writer):
+        lost_urls = writer.rollback()
+        for vacancy_url in lost_urls:
+            self.vacancy_index.discard(vacancy_url)
+        if lost_urls:
+            self.log(f"Отменено несохраненных вакансий: {len(lost_urls)}")
+
+    def run(self):
+        session = None
+        writer = None
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        slice_executors = {source: ThreadPoolExecutor(max_workers=self.max_slices) for source in self.connectors}
+        pages_queue = queue.Queue(maxsize=self.max_slices * 2 * max(1, len(self.connectors)))
+        vacancies_count = 0
+        plans = []
+        try:
+            session = self.db.get_session()
+            writer = VacancyWriter(session, self.commit_every, self.commit_interval)
+            checkpoints = CrawlCheckpointStore(session)
+
+            self.vacancy_index = VacancyIndex.load(session)
+            self.log(f"Загружен индекс вакансий: {len(self.vacancy_index)}")
+
+            plans = self.prepare_plans(checkpoints, slice_executors)
+            writer.commit()
+            slices = [(plan, crawl_slice) for plan in plans for crawl_slice in plan.pending_slices()]
+            self.log(f"Источников: {len(self.connectors)}, запросов: {len(plans)}, срезов для сбора: {len(slices)}")
+            self.progress.start(sum(plan.found or 0 for plan in plans), sum(plan.received for plan in plans))
+
+            for plan, crawl_slice in slices:
+                slice_executors[plan.source].submit(self.crawl_slice, plan, crawl_slice, pages_queue)
+
+            active_slices = len(slices)
+            while active_slices and not self.stop_flag:
+                try:
+                    plan, crawl_slice, page, pages, items = pages_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                if items is None:
+                    active_slices -= 1
+                    if page >= pages:
+                        checkpoints.mark_done(crawl_slice)
+                        vacancies_count += self.commit_batch(writer)
+                    continue
+
+                connector = self.connectors[plan.source]
+                plan.received += len(items)
+
+                try:
+                    added_urls = self.store_page(writer, executor, connector, items)
+                    for vacancy_url in added_urls:
+                        self.vacancy_index.add(vacancy_url)
+                    if not self.stop_flag:
+                        checkpoints.update(crawl_slice, page, pages, len(items), len(added_urls))
+                except Exception as e:
+                    self.discard_batch(writer)
+                    self.progress.error('db')
+                    self.log(f"Ошибка обработки страницы: {str(e)}")
+                    continue
+
+                self.progress.page(len(items), len(added_urls))
+                vacancies_count += self.commit_batch(writer)
+
+            for plan in plans:
+                # Отметку двигаем только если все оценки удались, иначе пропущенный период не соберется.
+                if plan.is_complete() and not plan.failed and not self.stop_flag:
+                    checkpoints.complete(plan.key)
+
+            vacancies_count += self.commit_batch(writer, force=True)
+            self.refresh_vacancies(writer, executor)
+
+        except Exception as e:
+            self.log(f"Критическая ошибка: {str(e)}")
+        finally:
+            for slice_executor in slice_executors.values():
+                slice_executor.shutdown(wait=True)
+            executor.shutdown(wait=True)
+            for plan in plans:
+                self.log(plan.coverage_message())
+            for connector in self.connectors.values():
+                self.log(connector.stats_message())
+                self.log(f"[{connector.title}] {connector.http.stats_message()}")
+            if writer:
+                vacancies_count += self.commit_batch(writer, force=True)
+                self.write_seconds = writer.write_seconds
+            if session:
+                session.close()
+            for connector in self.connectors.values():
+                if getattr(connector, 'detail_cache', None):
+                    connector.detail_cache.evict()
+            if self.archive:
+                self.archive.flush()
+                self.log(self.archive.stats_message())
+            self.progress.set_stage('done')
+
+        return vacancies_count
+
+    def stop(self):
+        self.stop_flag = True
+
+
+class HHCrawler(Crawler):
+    def __init__(self, db, search_queries, max_workers=8, max_slices=4, rate_limiter=None,
+                 commit_every=500, commit_interval=5.0, detail_cache=None,
+                 incremental=True, overlap=timedelta(hours=1), on_message=None,
+                 api_url=HHConnector.API_URL, http_client=None, connectors=(), **options):
+        self.hh = HHConnector(rate_limiter, http_client, max_workers + max_slices, api_url, detail_cache)
+        super().__init__(db, search_queries, [self.hh, *connectors], max_workers, max_slices,
+                         commit_every, commit_interval, incremental, overlap, on_message, **options)
+
+    @property
+    def http(self):
+        return self.hh.http
+
+    @property
+    def rate_limiter(self):
+        return self.hh.rate_limiter
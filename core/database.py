@@ -1,24 +1,93 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, scoped_session
 import os
+import threading
 from core.models import Base, User
+from core.migrations import MAIN_MIGRATIONS, USER_MIGRATIONS, migrate
+
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 15000
+}
+
+
+def create_sqlite_engine(db_path, pragmas=None):
+    settings = dict(SQLITE_PRAGMAS, **(pragmas or {}))
+    engine = create_engine(f'sqlite:///{db_path}')
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in settings.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    return engine
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_database(db_path=None):
+    db_path = Database.resolve_path(db_path)
+    return _shared(db_path, lambda: Database(db_path))
+
+
+def get_user_database(user_id):
+    db_path = UserDatabase.resolve_path(user_id)
+    return _shared(db_path, lambda: UserDatabase(user_id))
+
+
+def release_user_database(user_id):
+    if user_id:
+        release_database(UserDatabase.resolve_path(user_id))
+
+
+def release_database(db_path):
+    with _registry_lock:
+        database = _registry.pop(os.path.abspath(db_path), None)
+    if database:
+        database.dispose()
+
+
+def _shared(db_path, factory):
+    # Схема создается и мигрируется один раз на процесс, дальше все окна делят один движок.
+    with _registry_lock:
+        database = _registry.get(db_path)
+        if database is None:
+            database = _registry[db_path] = factory()
+        return database
 
 
 class Database:
-    def __init__(self):
-        db_path = os.path.join(os.path.dirname(__file__), '../data/vacancies.db')
+    def __init__(self, db_path=None, pragmas=None):
+        db_path = self.resolve_path(db_path)
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-        self.engine = create_engine(f'sqlite:///{db_path}')
+        self.engine = create_sqlite_engine(db_path, pragmas)
         self.Session = sessionmaker(bind=self.engine)
 
         self.create_tables()
+        migrate(self.engine, MAIN_MIGRATIONS)
 
         self.create_admin_user()
 
     def create_tables(self):
         Base.metadata.create_all(self.engine)
 
+    def vacuum(self):
+        with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql('VACUUM')
+            connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+
     def create_admin_user(self):
         session = self.get_session()
         try:
@@ -40,6 +109,15 @@ class Database:
     def get_session(self):
         return self.Session()
 
+    def dispose(self):
+        self.engine.dispose()
+
+    @staticmethod
+    def resolve_path(db_path=None):
+        if db_path is None:
+            db_path = os.path.join(os.path.dirname(__file__), '../data/vacancies.db')
+        return os.path.abspath(db_path)
+
     @staticmethod
     def hash_password(password: str) -> str:
         import bcrypt
@@ -54,50 +132,62 @@ class Database:
 
 
 class UserDatabase:
-    def __init__(self, user_id):
+    def __init__(self, user_id, pragmas=None):
         if not user_id:
             raise ValueError("User ID is required for UserDatabase")
 
-        db_dir = os.path.join(os.path.dirname(__file__), '../data/users')
-        os.makedirs(db_dir, exist_ok=True)
+        db_path = self.resolve_path(user_id)
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-        db_path = os.path.join(db_dir, f'user_{user_id}.db')
-        self.engine = create_engine(f'sqlite:///{db_path}')
+        self.engine = create_sqlite_engine(db_path, pragmas)
         self.Session = scoped_session(sessionmaker(bind=self.engine))
 
         self.create_tables()
 
     def create_tables(self):
-        from core.models import (Base, Vacancy, Company,
+        from core.models import (Base, Vacancy, VacancyDescription, Company,
                                  Skill, VacancySkill, Analysis,
-                                 AnalysisSkill)
+                                 AnalysisSkill, CollectionState)
 
         tables = [
             Vacancy.__table__,
+            VacancyDescription.__table__,
             Company.__table__,
             Skill.__table__,
             VacancySkill.__table__,
             Analysis.__table__,
-            AnalysisSkill.__table__
+            AnalysisSkill.__table__,
+            CollectionState.__table__
         ]
 
         Base.metadata.create_all(self.engine, tables=tables)
+        migrate(self.engine, USER_MIGRATIONS)
 
     def get_session(self):
         return self.Session()
 
+    def dispose(self):
+        self.Session.remove()
+        self.engine.dispose()
+
+    @staticmethod
+    def resolve_path(user_id):
+        return os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/users', f'user_{user_id}.db'))
+
     def clear_database(self):
-        from core.models import (Base, Vacancy, Company,
+        from core.models import (Base, Vacancy, VacancyDescription, Company,
                                  Skill, VacancySkill, Analysis,
-                                 AnalysisSkill)
+                                 AnalysisSkill, CollectionState)
 
         tables = [
             Vacancy.__table__,
+            VacancyDescription.__table__,
             Company.__table__,
             Skill.__table__,
             VacancySkill.__table__,
             Analysis.__table__,
-            AnalysisSkill.__table__
+            AnalysisSkill.__table__,
+            CollectionState.__table__
         ]
 
         Base.metadata.drop_all(self.engine, tables=tables)
@@ -105,7 +195,9 @@ class UserDatabase:
         self.Session.remove()
 
     def delete_database(self):
-        self.Session.remove()
         db_path = self.engine.url.database
-        if os.path.exists(db_path):
-            os.remove(db_path)
+        release_database(db_path)
+        self.dispose()
+        for path in (db_path, f'{db_path}-wal', f'{db_path}-shm'):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,144 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class CachedDetail:
+    def __init__(self, payload, etag, last_modified, fetched_at, ttl):
+        self.payload = payload
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+
+    @property
+    def is_fresh(self):
+        return time.time() - self.fetched_at < self.ttl
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class DetailCache:
+    def __init__(self, path=None, ttl=3 * 24 * 3600, max_bytes=512 * 1024 * 1024, evict_every=500):
+        if path is None:
+            path = os.path.join(os.path.dirname(__file__), '../data/detail_cache.db')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self.puts_since_eviction = 0
+        self.accessed = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS details ('
+            'vacancy_id TEXT PRIMARY KEY, payload BLOB NOT NULL, etag TEXT, last_modified TEXT, '
+            'fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS ix_details_accessed_at ON details (accessed_at)')
+        self.connection.commit()
+
+    def get(self, vacancy_id):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT payload, etag, last_modified, fetched_at FROM details WHERE vacancy_id = ?',
+                (vacancy_id,)
+            ).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+
+            # Время обращения копим в памяти и пишем пачкой, иначе каждое чтение кэша
+            # становится отдельной транзакцией записи под общей блокировкой.
+            self.accessed[vacancy_id] = time.time()
+            if len(self.accessed) >= self.evict_every:
+                self._flush_accessed()
+
+        payload, etag, last_modified, fetched_at = row
+        detail = CachedDetail(json.loads(zlib.decompress(payload)), etag, last_modified, fetched_at, self.ttl)
+        if detail.is_fresh:
+            self.hits += 1
+        return detail
+
+    def put(self, vacancy_id, payload, etag=None, last_modified=None):
+        blob = zlib.compress(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO details '
+                '(vacancy_id, payload, etag, last_modified, fetched_at, accessed_at, size) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (vacancy_id, blob, etag, last_modified, now, now, len(blob))
+            )
+            self.connection.commit()
+            self.puts_since_eviction += 1
+            if self.puts_since_eviction >= self.evict_every:
+                self._evict()
+
+    def revalidate(self, vacancy_id):
+        with self.lock:
+            self.revalidated += 1
+            self.connection.execute(
+                'UPDATE details SET fetched_at = ?, accessed_at = ? WHERE vacancy_id = ?',
+                (time.time(), time.time(), vacancy_id)
+            )
+            self.connection.commit()
+
+    def evict(self):
+        with self.lock:
+            self._evict()
+
+    def stats_message(self):
+        return (f"Кэш деталей: попаданий {self.hits}, промахов {self.misses}, "
+                f"подтверждено 304: {self.revalidated}")
+
+    def close(self):
+        with self.lock:
+            self._evict()
+            self.connection.close()
+
+    def _flush_accessed(self):
+        if not self.accessed:
+            return
+        self.connection.executemany(
+            'UPDATE details SET accessed_at = ? WHERE vacancy_id = ?',
+            [(accessed_at, vacancy_id) for vacancy_id, accessed_at in self.accessed.items()]
+        )
+        self.connection.commit()
+        self.accessed = {}
+
+    def _evict(self):
+        self._flush_accessed()
+        self.puts_since_eviction = 0
+        total = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM details').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale_ids = []
+        for vacancy_id, size in self.connection.execute(
+                'SELECT vacancy_id, size FROM details ORDER BY accessed_at'):
+            stale_ids.append((vacancy_id,))
+            freed += size
+            if freed >= target:
+                break
+
+        self.connection.executemany('DELETE FROM details WHERE vacancy_id = ?', stale_ids)
+        self.connection.commit()
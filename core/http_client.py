@@ -0,0 +1,79 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ApiHttpClient:
+    DEFAULT_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'application/json',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    }
+
+    def __init__(self, pool_size=10, pool_connections=4):
+        self.pool_size = max(1, pool_size)
+        self.session = requests.Session()
+        self.session.headers.update(self.DEFAULT_HEADERS)
+
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=self.pool_size,
+            pool_block=True,
+            max_retries=0
+        )
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+        self.lock = threading.Lock()
+        self.requests_count = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+
+        try:
+            wire_bytes = response.raw.tell()
+        except (AttributeError, OSError):
+            wire_bytes = 0
+
+        with self.lock:
+            self.requests_count += 1
+            self.wire_bytes += wire_bytes or len(response.content)
+            self.body_bytes += len(response.content)
+        return response
+
+    def connection_stats(self):
+        connections = 0
+        pool_requests = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            pool_requests += pool.num_requests
+        return connections, pool_requests
+
+    def stats(self):
+        connections, pool_requests = self.connection_stats()
+        with self.lock:
+            return {
+                'requests': self.requests_count,
+                'wire_bytes': self.wire_bytes,
+                'body_bytes': self.body_bytes,
+                'connections': connections,
+                'reuse_ratio': 1 - connections / pool_requests if pool_requests else 0.0
+            }
+
+    def stats_message(self):
+        stats = self.stats()
+        compression = stats['wire_bytes'] / stats['body_bytes'] if stats['body_bytes'] else 1.0
+        return (f"HTTP: запросов {stats['requests']}, передано {stats['wire_bytes'] / 1024 / 1024:.1f} МБ "
+                f"({compression * 100:.0f}% от распакованного), соединений {stats['connections']}, "
+                f"повторное использование {stats['reuse_ratio'] * 100:.0f}%")
+
+    def close(self):
+        self.session.close()
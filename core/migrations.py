@@ -0,0 +1,109 @@
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from core.models import Base, Vacancy, VacancyDescription
+from core.vacancy_search import VacancySearch
+
+
+def create_indexes(*names):
+    def apply(connection):
+        indexes = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+        for name in names:
+            indexes[name].create(connection, checkfirst=True)
+        connection.exec_driver_sql('ANALYZE')
+    return apply
+
+
+def add_columns(table_name, *names):
+    def apply(connection):
+        existing = {row[1] for row in connection.exec_driver_sql(f'PRAGMA table_info({table_name})')}
+        table = Base.metadata.tables[table_name]
+        for name in names:
+            if name in existing:
+                continue
+            column = table.c[name]
+            column_type = column.type.compile(connection.dialect)
+            connection.exec_driver_sql(f'ALTER TABLE {table_name} ADD COLUMN {name} {column_type}')
+    return apply
+
+
+def move_legacy_descriptions(connection, chunk_size=500):
+    while True:
+        rows = connection.execute(
+            select(Vacancy.id, Vacancy.legacy_description)
+            .where(Vacancy.legacy_description.isnot(None))
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        descriptions = [
+            {'vacancy_id': vacancy_id, 'content': VacancyDescription.pack(text)}
+            for vacancy_id, text in rows if text
+        ]
+        if descriptions:
+            connection.execute(insert(VacancyDescription.__table__).on_conflict_do_nothing(), descriptions)
+        connection.execute(
+            update(Vacancy.__table__)
+            .where(Vacancy.__table__.c.id.in_([row.id for row in rows]))
+            .values(description=None)
+        )
+
+
+def combine(*steps):
+    def apply(connection):
+        for step in steps:
+            step(connection)
+    return apply
+
+
+MAIN_MIGRATIONS = [
+    (1, "Индексы фильтров, связей и служебных таблиц сборщика", create_indexes(
+        'ix_vacancies_published_date',
+        'ix_vacancies_source_published_date',
+        'ix_vacancies_salary',
+        'ix_vacancies_employment_type',
+        'ix_vacancies_company_id',
+        'ix_vacancies_skills_skill_id',
+        'ix_vacancy_fingerprints_checked_at',
+        'ix_crawl_checkpoints_query'
+    )),
+    (2, "Полнотекстовый индекс названий вакансий", VacancySearch.create),
+    (3, "Ревизии изменений вакансий для синхронизации подборок", combine(
+        add_columns('vacancy_fingerprints', 'revision'),
+        create_indexes('ix_vacancy_fingerprints_revision')
+    )),
+    (4, "Перенос описаний вакансий в сжатую таблицу", move_legacy_descriptions),
+]
+
+USER_MIGRATIONS = [
+    (1, "Индексы фильтров и связей", create_indexes(
+        'ix_vacancies_published_date',
+        'ix_vacancies_source_published_date',
+        'ix_vacancies_salary',
+        'ix_vacancies_employment_type',
+        'ix_vacancies_company_id',
+        'ix_vacancies_skills_skill_id'
+    )),
+]
+
+
+def schema_version(connection):
+    return connection.exec_driver_sql('PRAGMA user_version').scalar() or 0
+
+
+def migrate(engine, migrations):
+    with engine.connect() as connection:
+        current = schema_version(connection)
+
+    applied = []
+    for version, description, apply in sorted(migrations, key=lambda migration: migration[0]):
+        if version <= current:
+            continue
+
+        with engine.begin() as connection:
+            apply(connection)
+            connection.exec_driver_sql(f'PRAGMA user_version={version}')
+        applied.append(description)
+        current = version
+    return applied
@@ -1,5 +1,7 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, Date, Float, ForeignKey
-from sqlalchemy.orm import declarative_base, relationship
+import zlib
+
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, Date, Float, ForeignKey, LargeBinary, Index
+from sqlalchemy.orm import declarative_base, relationship, deferred
 from datetime import datetime
 from sqlalchemy import DateTime
 Base = declarative_base()
@@ -29,10 +31,17 @@ class User(Base):
 
 class Vacancy(Base):
     __tablename__ = 'vacancies'
+    __table_args__ = (
+        Index('ix_vacancies_published_date', 'published_date'),
+        Index('ix_vacancies_source_published_date', 'source', 'published_date'),
+        Index('ix_vacancies_salary', 'salary_currency', 'salary_min', 'salary_max'),
+        Index('ix_vacancies_employment_type', 'employment_type', 'is_remote'),
+        Index('ix_vacancies_company_id', 'company_id'),
+    )
     id = Column(Integer, primary_key=True)
     company_id = Column(Integer, ForeignKey('companies.id'))
     title = Column(String, nullable=False)
-    description = Column(String)
+    legacy_description = deferred(Column('description', String))
     url = Column(String, unique=True)
     city = Column(String, nullable=True)
     published_date = Column(Date)
@@ -45,6 +54,17 @@ class Vacancy(Base):
 
     company = relationship("Company")
     skills = relationship("Skill", secondary='vacancies_skills')
+    description_entry = relationship("VacancyDescription", uselist=False, cascade="all, delete-orphan")
+
+    @property
+    def description(self):
+        if self.description_entry:
+            return VacancyDescription.unpack(self.description_entry.content)
+        return self.legacy_description
+
+    @description.setter
+    def description(self, value):
+        self.description_entry = VacancyDescription(content=VacancyDescription.pack(value)) if value else None
 
     def to_dict(self):
         return {
@@ -60,8 +80,38 @@ class Vacancy(Base):
         }
 
 
+class VacancyDescription(Base):
+    __tablename__ = 'vacancy_descriptions'
+    vacancy_id = Column(Integer, ForeignKey('vacancies.id'), primary_key=True)
+    content = Column(LargeBinary, nullable=False)
+
+    @staticmethod
+    def pack(text):
+        return zlib.compress(text.encode('utf-8'), 6)
+
+    @staticmethod
+    def unpack(content):
+        return zlib.decompress(content).decode('utf-8')
+
+
+class VacancyFingerprint(Base):
+    __tablename__ = 'vacancy_fingerprints'
+    __table_args__ = (
+        Index('ix_vacancy_fingerprints_checked_at', 'is_archived', 'checked_at'),
+        Index('ix_vacancy_fingerprints_revision', 'revision'),
+    )
+    vacancy_id = Column(Integer, ForeignKey('vacancies.id'), primary_key=True)
+    content_hash = Column(String)
+    checked_at = Column(DateTime)
+    is_archived = Column(Boolean, default=False)
+    revision = Column(Integer)
+
+
 class VacancySkill(Base):
     __tablename__ = 'vacancies_skills'
+    __table_args__ = (
+        Index('ix_vacancies_skills_skill_id', 'skill_id', 'vacancy_id'),
+    )
     vacancy_id = Column(Integer, ForeignKey('vacancies.id'), primary_key=True)
     skill_id = Column(Integer, ForeignKey('skills.id'), primary_key=True)
 
@@ -119,3 +169,40 @@ class TemplateVacancy(Base):
     template_id = Column(Integer, ForeignKey('templates.id'))
     vacancy_query = Column(String, nullable=False)
     template = relationship("Template")
+
+
+class CrawlCheckpoint(Base):
+    __tablename__ = 'crawl_checkpoints'
+    __table_args__ = (
+        Index('ix_crawl_checkpoints_query', 'query', 'date_from'),
+    )
+    id = Column(Integer, primary_key=True)
+    query = Column(String, nullable=False)
+    query_found = Column(Integer, default=0)
+    date_from = Column(DateTime)
+    date_to = Column(DateTime)
+    found = Column(Integer, default=0)
+    last_page = Column(Integer, default=-1)
+    pages = Column(Integer)
+    received = Column(Integer, default=0)
+    added = Column(Integer, default=0)
+    is_done = Column(Boolean, default=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class CrawlState(Base):
+    __tablename__ = 'crawl_states'
+    id = Column(Integer, primary_key=True)
+    query = Column(String, unique=True, nullable=False)
+    high_water_mark = Column(DateTime)
+    pending_mark = Column(DateTime)
+    last_success_at = Column(DateTime)
+
+
+class CollectionState(Base):
+    __tablename__ = 'collection_states'
+    id = Column(Integer, primary_key=True)
+    source_path = Column(String)
+    spec = Column(String)
+    revision = Column(Integer)
+    synced_at = Column(DateTime)
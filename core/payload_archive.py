@@ -0,0 +1,119 @@
+import glob
+import gzip
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+
+
+class PayloadArchive:
+    FILE_PATTERN = 'payloads-*.jsonl.gz'
+
+    def __init__(self, path=None, max_bytes=256 * 1024 * 1024, flush_every=500):
+        if path is None:
+            path = os.path.join(os.path.dirname(__file__), '../data/archive')
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        self.file = None
+        self.file_bytes = 0
+        self.unflushed = 0
+        self.files_count = 0
+        self.records_count = 0
+
+    def write(self, source, kind, url, payload):
+        self.write_many(source, kind, [(url, payload)])
+
+    def write_many(self, source, kind, entries):
+        fetched_at = datetime.now().isoformat(timespec='seconds')
+        lines = [
+            json.dumps({'source': source, 'kind': kind, 'url': url, 'fetched_at': fetched_at, 'payload': payload},
+                       ensure_ascii=False).encode('utf-8') + b'\n'
+            for url, payload in entries
+        ]
+        if not lines:
+            return
+
+        with self.lock:
+            if self.file is None or self.file_bytes >= self.max_bytes:
+                self._rotate()
+
+            data = b''.join(lines)
+            self.file.write(data)
+            self.file_bytes += len(data)
+            self.records_count += len(lines)
+            self.unflushed += len(lines)
+            if self.unflushed >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def stats_message(self):
+        return f"Архив ответов API: записей {self.records_count}, файлов {self.files_count}"
+
+    def _flush(self):
+        if self.file:
+            self.file.flush()
+        self.unflushed = 0
+
+    def _rotate(self):
+        if self.file:
+            self.file.close()
+
+        name = (f"payloads-{datetime.now().strftime('%Y%m%d-%H%M%S')}-"
+                f"{os.getpid()}-{self.files_count:04d}.jsonl.gz")
+        self.file = gzip.open(os.path.join(self.path, name), 'wb', compresslevel=6)
+        self.file_bytes = 0
+        self.files_count += 1
+
+    @classmethod
+    def files(cls, path):
+        return sorted(glob.glob(os.path.join(path, cls.FILE_PATTERN)))
+
+    @staticmethod
+    def read_lines(file_path):
+        # Файл последнего запуска может быть не закрыт - читаем до последней целой строки.
+        try:
+            with gzip.open(file_path, 'rb') as file:
+                yield from file
+        except (EOFError, OSError, zlib.error):
+            return
+
+    @staticmethod
+    def decode(lines):
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries
+
+    @classmethod
+    def read_batches(cls, path, batch_size=1000):
+        batch = []
+        for file_path in cls.files(path):
+            for line in cls.read_lines(file_path):
+                batch.append(line)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    @classmethod
+    def read(cls, path):
+        for batch in cls.read_batches(path):
+            yield from cls.decode(batch)
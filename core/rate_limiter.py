@@ -0,0 +1,98 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class AdaptiveRateLimiter:
+    THROTTLE_STATUSES = (403, 429)
+
+    def __init__(self, rate=4.0, min_rate=0.5, max_rate=15.0, burst=4,
+                 increase_step=1.0, decrease_factor=0.5, error_decrease_factor=0.85):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.error_decrease_factor = error_decrease_factor
+
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+        self.requests_count = 0
+        self.rejections = {}
+
+    def is_rejection(self, status_code):
+        return status_code in self.THROTTLE_STATUSES or status_code >= 500
+
+    def acquire(self, stop_check=None):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.requests_count += 1
+                    return True
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+
+            if stop_check and stop_check():
+                return False
+            time.sleep(min(wait, 0.5))
+
+    def on_response(self, response):
+        status_code = response.status_code
+        if not self.is_rejection(status_code):
+            with self.lock:
+                self.rate = min(self.max_rate, self.rate + self.increase_step / self.rate)
+            return
+
+        self.on_rejection(str(status_code), self.parse_retry_after(response.headers.get('Retry-After')))
+
+    def on_rejection(self, reason, retry_after=None):
+        throttled = reason in (str(status) for status in self.THROTTLE_STATUSES)
+        with self.lock:
+            self.rejections[reason] = self.rejections.get(reason, 0) + 1
+            factor = self.decrease_factor if throttled else self.error_decrease_factor
+            self.rate = max(self.min_rate, self.rate * factor)
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            self.tokens = 0.0
+
+    @staticmethod
+    def parse_retry_after(value):
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def stats(self):
+        with self.lock:
+            return {
+                'rate': self.rate,
+                'requests': self.requests_count,
+                'rejections': dict(self.rejections)
+            }
+
+    def stats_message(self):
+        stats = self.stats()
+        rejections = ", ".join(f"{reason}: {count}" for reason, count in sorted(stats['rejections'].items()))
+        return (f"Лимит запросов: {stats['rate']:.2f}/с, запросов: {stats['requests']}, "
+                f"отказов: {sum(stats['rejections'].values())}" + (f" ({rejections})" if rejections else ""))
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        self.tokens = min(float(self.burst), self.tokens + elapsed * self.rate)
@@ -0,0 +1,216 @@
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import column, delete, insert, or_, select, table
+
+from core.constants import EmploymentType
+from core.models import CollectionState, Company, Vacancy, VacancyFingerprint
+from core.vacancy_search import VacancySearch
+
+
+class VacancyCopier:
+    SOURCE_SCHEMA = 'source_db'
+    VACANCY_COLUMNS = ('id', 'title', 'url', 'city', 'published_date', 'source', 'salary_min',
+                       'salary_max', 'salary_currency', 'is_remote', 'employment_type')
+    STAGES = ('Отбор вакансий', 'Удаление неподходящих вакансий', 'Копирование новых и измененных',
+              'Сохранение подборки')
+
+    def __init__(self, main_db, user_db, on_progress=None, stop_check=None):
+        self.main_db = main_db
+        self.user_db = user_db
+        self.on_progress = on_progress
+        self.stop_check = stop_check
+
+    def copy(self, search_queries, filters):
+        with self.user_db.engine.connect() as connection:
+            # ATTACH нельзя выполнить внутри транзакции, поэтому подключаем базу до первой записи.
+            connection.exec_driver_sql(
+                f'ATTACH DATABASE ? AS {self.SOURCE_SCHEMA}',
+                (self.main_db.engine.url.database,)
+            )
+            try:
+                result = self._copy(connection, search_queries, filters)
+                if result is None:
+                    connection.rollback()
+                else:
+                    connection.commit()
+                return result
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                connection.exec_driver_sql(f'DETACH DATABASE {self.SOURCE_SCHEMA}')
+                connection.commit()
+
+    def _copy(self, connection, search_queries, filters):
+        source = self.SOURCE_SCHEMA
+        if self.step(0):
+            return None
+        for name in ('collection_ids', 'collection_scope', 'collection_removed', 'collection_changed'):
+            connection.exec_driver_sql(f'CREATE TEMP TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY)')
+            connection.exec_driver_sql(f'DELETE FROM temp.{name}')
+
+        # Первая запись уже открыла транзакцию, так что ревизия и выборка читают один снимок основной базы.
+        revision = connection.exec_driver_sql(
+            f'SELECT coalesce(max(revision), 0) FROM {source}.vacancy_fingerprints'
+        ).scalar()
+        spec = self.spec(search_queries, filters)
+        state = connection.execute(select(CollectionState).order_by(CollectionState.id.desc()).limit(1)).first()
+        if state is not None and state.source_path != self.source_path():
+            state = None
+        is_delta = state is not None and state.spec == spec and state.revision is not None
+
+        query = self.filter_ids(search_queries, filters)
+        translate = {'schema_translate_map': {None: source}}
+        if is_delta:
+            scope = select(VacancyFingerprint.vacancy_id).where(VacancyFingerprint.revision > state.revision)
+            connection.execute(insert(self.table('collection_scope')).from_select(['id'], scope),
+                               execution_options=translate)
+            query = query.where(Vacancy.id.in_(select(self.table('collection_scope').c.id)))
+        connection.execute(insert(self.table('collection_ids')).from_select(['id'], query),
+                           execution_options=translate)
+
+        if self.step(1):
+            return None
+        scope_sql = 'SELECT id FROM temp.collection_scope' if is_delta else 'SELECT id FROM main.vacancies'
+        removed = connection.exec_driver_sql(
+            f'INSERT INTO temp.collection_removed '
+            f'SELECT id FROM main.vacancies WHERE id IN ({scope_sql}) '
+            f'AND id NOT IN (SELECT id FROM temp.collection_ids)'
+        ).rowcount
+        for table_name, key in (('vacancy_descriptions', 'vacancy_id'), ('vacancies_skills', 'vacancy_id'),
+                                ('vacancies', 'id')):
+            connection.exec_driver_sql(
+                f'DELETE FROM main.{table_name} WHERE {key} IN (SELECT id FROM temp.collection_removed)'
+            )
+
+        if self.step(2):
+            return None
+        changed_sql = (f'SELECT s.id FROM temp.collection_ids s '
+                       f'LEFT JOIN main.vacancies u ON u.id = s.id '
+                       f'LEFT JOIN {source}.vacancy_fingerprints f ON f.vacancy_id = s.id')
+        if state is None or state.revision is None:
+            connection.exec_driver_sql(f'INSERT INTO temp.collection_changed {changed_sql}')
+        else:
+            connection.exec_driver_sql(
+                f'INSERT INTO temp.collection_changed {changed_sql} WHERE u.id IS NULL OR f.revision > ?',
+                (state.revision,)
+            )
+        updated = self.copy_changed(connection)
+        if self.step(3):
+            return None
+
+        connection.execute(delete(CollectionState))
+        connection.execute(insert(CollectionState).values(
+            source_path=self.source_path(), spec=spec, revision=revision, synced_at=datetime.now()
+        ))
+        total = connection.exec_driver_sql('SELECT count(*) FROM main.vacancies').scalar()
+        return {'total': total, 'updated': updated, 'removed': removed, 'is_delta': is_delta}
+
+    def step(self, index):
+        if self.stop_check and self.stop_check():
+            return True
+        if self.on_progress:
+            self.on_progress({'stage': self.STAGES[index], 'done': index, 'total': len(self.STAGES)})
+        return False
+
+    def copy_changed(self, connection):
+        source = self.SOURCE_SCHEMA
+        connection.exec_driver_sql(
+            'DELETE FROM main.vacancies_skills WHERE vacancy_id IN (SELECT id FROM temp.collection_changed)'
+        )
+        connection.exec_driver_sql(
+            f'INSERT OR IGNORE INTO main.companies (name) '
+            f'SELECT DISTINCT c.name FROM temp.collection_changed s '
+            f'JOIN {source}.vacancies v ON v.id = s.id '
+            f'JOIN {source}.companies c ON c.id = v.company_id'
+        )
+        connection.exec_driver_sql(
+            f'INSERT OR IGNORE INTO main.skills (name) '
+            f'SELECT DISTINCT k.name FROM temp.collection_changed s '
+            f'JOIN {source}.vacancies_skills vs ON vs.vacancy_id = s.id '
+            f'JOIN {source}.skills k ON k.id = vs.skill_id'
+        )
+
+        columns = ', '.join(self.VACANCY_COLUMNS)
+        source_columns = ', '.join(f'v.{name}' for name in self.VACANCY_COLUMNS)
+        updated = connection.exec_driver_sql(
+            f'INSERT OR REPLACE INTO main.vacancies ({columns}, company_id) '
+            f'SELECT {source_columns}, uc.id FROM temp.collection_changed s '
+            f'JOIN {source}.vacancies v ON v.id = s.id '
+            f'JOIN {source}.companies c ON c.id = v.company_id '
+            f'JOIN main.companies uc ON uc.name = c.name'
+        ).rowcount
+
+        connection.exec_driver_sql(
+            f'INSERT OR IGNORE INTO main.vacancies_skills (vacancy_id, skill_id) '
+            f'SELECT vs.vacancy_id, us.id FROM temp.collection_changed s '
+            f'JOIN {source}.vacancies_skills vs ON vs.vacancy_id = s.id '
+            f'JOIN {source}.skills k ON k.id = vs.skill_id '
+            f'JOIN main.skills us ON us.name = k.name'
+        )
+        return updated
+
+    def source_path(self):
+        return os.path.abspath(self.main_db.engine.url.database)
+
+    @staticmethod
+    def spec(search_queries, filters):
+        return json.dumps({'queries': sorted(search_queries), 'filters': filters},
+                          ensure_ascii=False, sort_keys=True, default=str)
+
+    @staticmethod
+    def table(name):
+        return table(name, column('id'), schema='temp')
+
+    @staticmethod
+    def filter_ids(search_queries, filters):
+        query = select(Vacancy.id).join(Company, Company.id == Vacancy.company_id) \
+            .outerjoin(VacancyFingerprint, VacancyFingerprint.vacancy_id == Vacancy.id) \
+            .where(or_(VacancyFingerprint.is_archived.is_(None), VacancyFingerprint.is_archived == False))
+
+        if search_queries:
+            query = query.where(VacancySearch.title_filter(search_queries))
+
+        if filters.get('sources'):
+            query = query.where(Vacancy.source.in_(filters['sources']))
+
+        if filters.get('date_from'):
+            query = query.where(Vacancy.published_date >= filters['date_from'])
+        if filters.get('date_to'):
+            query = query.where(Vacancy.published_date <= filters['date_to'])
+
+        if filters.get('salary_min'):
+            query = query.where(or_(Vacancy.salary_min >= filters['salary_min'], Vacancy.salary_min == None))
+        if filters.get('salary_max'):
+            query = query.where(or_(Vacancy.salary_max <= filters['salary_max'], Vacancy.salary_max == None))
+
+        if filters.get('salary_currency'):
+            if filters['salary_currency'] == 'RUR':
+                query = query.where(or_(
+                    Vacancy.salary_currency == 'RUR',
+                    Vacancy.salary_currency == 'RUB',
+                    Vacancy.salary_currency == None
+                ))
+            else:
+                query = query.where(or_(
+                    Vacancy.salary_currency == filters['salary_currency'],
+                    Vacancy.salary_currency == None
+                ))
+
+        if filters.get('remote'):
+            query = query.where(or_(Vacancy.is_remote == True, Vacancy.is_remote == None))
+
+        employment_filters = [
+            or_(Vacancy.employment_type == employment_type, Vacancy.employment_type == None)
+            for key, employment_type in (
+                ('fulltime', EmploymentType.FULL),
+                ('parttime', EmploymentType.PART),
+                ('project', EmploymentType.PROJECT)
+            ) if filters.get(key)
+        ]
+        if employment_filters:
+            query = query.where(or_(*employment_filters))
+
+        return query
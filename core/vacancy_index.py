@@ -0,0 +1,79 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+from core.models import Vacancy
+
+
+class VacancyIndex:
+    ID_PATTERN = re.compile(r'/vacanc(?:y|ies)/(\d+)')
+
+    def __init__(self, ids=(), other_keys=()):
+        self.ids = array('q', sorted(set(ids)))
+        self.other_keys = set(other_keys)
+        self.added_ids = set()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, session, batch_size=10000):
+        ids = []
+        other_keys = set()
+        rows = session.query(Vacancy.url).filter(Vacancy.url.isnot(None)).yield_per(batch_size)
+        for (url,) in rows:
+            key = cls.key(url)
+            if isinstance(key, int):
+                ids.append(key)
+            else:
+                other_keys.add(key)
+        return cls(ids, other_keys)
+
+    @classmethod
+    def key(cls, url):
+        match = cls.ID_PATTERN.search(url)
+        if match:
+            return int(match.group(1))
+        return url
+
+    def __len__(self):
+        return len(self.ids) + len(self.added_ids) + len(self.other_keys)
+
+    def __contains__(self, url):
+        with self.lock:
+            return self._contains(self.key(url))
+
+    def add(self, url):
+        key = self.key(url)
+        with self.lock:
+            if isinstance(key, int):
+                self.added_ids.add(key)
+            else:
+                self.other_keys.add(key)
+
+    def discard(self, url):
+        key = self.key(url)
+        with self.lock:
+            if isinstance(key, int):
+                self.added_ids.discard(key)
+            else:
+                self.other_keys.discard(key)
+
+    def filter_new(self, urls):
+        new_urls = []
+        seen = set()
+        with self.lock:
+            for url in urls:
+                key = self.key(url)
+                if key in seen or self._contains(key):
+                    continue
+                seen.add(key)
+                new_urls.append(url)
+        return new_urls
+
+    def _contains(self, key):
+        if not isinstance(key, int):
+            return key in self.other_keys
+        if key in self.added_ids:
+            return True
+        position = bisect_left(self.ids, key)
+        return position < len(self.ids) and self.ids[position] == key
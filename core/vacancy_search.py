@@ -0,0 +1,58 @@
+import re
+
+from sqlalchemy import column, literal_column, or_, select, table
+
+from core.models import Vacancy
+
+
+class VacancySearch:
+    TABLE = 'vacancies_fts'
+    TOKEN_PATTERN = re.compile(r'[\w+#]+')
+    # Символы + и # входят в токены, иначе «C++» и «C#» превратились бы в префикс «c».
+    TOKENIZER = "unicode61 remove_diacritics 2 tokenchars '+#'"
+    TITLE_SQL = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+    fts = table(TABLE, column('rowid'))
+
+    @classmethod
+    def create(cls, connection):
+        title = cls.TITLE_SQL
+        statements = [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {cls.TABLE} USING fts5("
+            f"title, tokenize=\"{cls.TOKENIZER}\")",
+            f"CREATE TRIGGER IF NOT EXISTS {cls.TABLE}_insert AFTER INSERT ON vacancies BEGIN "
+            f"INSERT INTO {cls.TABLE}(rowid, title) VALUES (new.id, {title.format('new.title')}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {cls.TABLE}_delete AFTER DELETE ON vacancies BEGIN "
+            f"DELETE FROM {cls.TABLE} WHERE rowid = old.id; END",
+            f"CREATE TRIGGER IF NOT EXISTS {cls.TABLE}_update AFTER UPDATE OF title ON vacancies BEGIN "
+            f"DELETE FROM {cls.TABLE} WHERE rowid = old.id; "
+            f"INSERT INTO {cls.TABLE}(rowid, title) VALUES (new.id, {title.format('new.title')}); END",
+            f"DELETE FROM {cls.TABLE}",
+            f"INSERT INTO {cls.TABLE}(rowid, title) SELECT id, {title.format('title')} FROM vacancies",
+        ]
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+
+    @classmethod
+    def tokens(cls, query):
+        return cls.TOKEN_PATTERN.findall(query.replace('ё', 'е').replace('Ё', 'Е'))
+
+    @classmethod
+    def match_expression(cls, query):
+        tokens = cls.tokens(query)
+        if not tokens:
+            return None
+        return ' + '.join(f'"{token}"*' for token in tokens)
+
+    @classmethod
+    def matching_ids(cls, queries):
+        expression = ' OR '.join(f'({match})' for match in map(cls.match_expression, queries) if match)
+        return select(cls.fts.c.rowid).where(literal_column(cls.TABLE).op('MATCH')(expression))
+
+    @classmethod
+    def title_filter(cls, queries):
+        clauses = []
+        if any(cls.match_expression(query) for query in queries):
+            clauses.append(Vacancy.id.in_(cls.matching_ids(queries)))
+        clauses.extend(Vacancy.title.ilike(f'%{query}%') for query in queries if not cls.match_expression(query))
+        return or_(*clauses)
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import time
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, func, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from core.models import Company, Skill, Vacancy, VacancyDescription, VacancyFingerprint, VacancySkill
+
+
+class VacancyWriter:
+    LOOKUP_CHUNK = 500
+    HASH_FIELDS = ('title', 'description', 'published_date', 'salary_min', 'salary_max',
+                   'salary_currency', 'is_remote', 'city', 'employment_type')
+
+    def __init__(self, session, batch_size=500, batch_seconds=5.0):
+        self.session = session
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.company_ids = {}
+        self.skill_ids = {}
+        self.pending = []
+        self.uncommitted_urls = []
+        self.batch_started_at = time.monotonic()
+        self.write_seconds = 0.0
+
+    def write(self, records):
+        if not records:
+            return []
+
+        started_at = time.perf_counter()
+        try:
+            return self._write(records)
+        finally:
+            self.write_seconds += time.perf_counter() - started_at
+
+    def _write(self, records):
+        records = [self.prepare(record) for record in records]
+        self.intern(Company, self.company_ids, {record['company'] for record in records})
+        self.intern(Skill, self.skill_ids, {name for record in records for name in record['skills']})
+
+        rows = []
+        descriptions = {}
+        for record in records:
+            row = dict(record['vacancy'])
+            row['company_id'] = self.company_ids[record['company']]
+            if record['description_blob']:
+                descriptions[row['url']] = record['description_blob']
+            rows.append(row)
+
+        table = Vacancy.__table__
+        # RETURNING отдает только реально вставленные строки: вакансии, которые уже записал
+        # другой сборщик, не попадают в счетчики добавленных.
+        vacancy_ids = dict(self.session.execute(
+            insert(table).on_conflict_do_nothing(index_elements=['url']).returning(table.c.url, table.c.id),
+            rows
+        ).all())
+        urls = list(vacancy_ids)
+
+        links = [
+            {'vacancy_id': vacancy_ids[record['vacancy']['url']], 'skill_id': self.skill_ids[name]}
+            for record in records
+            if record['vacancy']['url'] in vacancy_ids
+            for name in record['skills']
+        ]
+        if links:
+            self.session.execute(insert(VacancySkill.__table__).on_conflict_do_nothing(), links)
+
+        description_rows = [
+            {'vacancy_id': vacancy_ids[url], 'content': content}
+            for url, content in descriptions.items()
+            if url in vacancy_ids
+        ]
+        if description_rows:
+            self.session.execute(
+                insert(VacancyDescription.__table__).on_conflict_do_nothing(),
+                description_rows
+            )
+
+        checked_at = datetime.now()
+        revision = self.next_revision()
+        fingerprints = [
+            {'vacancy_id': vacancy_ids[record['vacancy']['url']], 'content_hash': record['content_hash'],
+             'checked_at': checked_at, 'is_archived': False, 'revision': revision}
+            for record in records
+            if record['vacancy']['url'] in vacancy_ids
+        ]
+        if fingerprints:
+            self.session.execute(insert(VacancyFingerprint.__table__).on_conflict_do_nothing(), fingerprints)
+
+        self.uncommitted_urls.extend(urls)
+        return urls
+
+    def update(self, records_by_id):
+        if not records_by_id:
+            return
+
+        started_at = time.perf_counter()
+        try:
+            self._update(records_by_id)
+        finally:
+            self.write_seconds += time.perf_counter() - started_at
+
+    def _update(self, records_by_id):
+        records_by_id = {vacancy_id: self.prepare(record) for vacancy_id, record in records_by_id.items()}
+        records = list(records_by_id.values())
+        self.intern(Company, self.company_ids, {record['company'] for record in records})
+        self.intern(Skill, self.skill_ids, {name for record in records for name in record['skills']})
+
+        rows = []
+        descriptions = []
+        for vacancy_id, record in records_by_id.items():
+            row = dict(record['vacancy'])
+            row.pop('url', None)
+            if record['description_blob']:
+                descriptions.append({'vacancy_id': vacancy_id, 'content': record['description_blob']})
+            row['company_id'] = self.company_ids[record['company']]
+            row['vacancy_key'] = vacancy_id
+            rows.append(row)
+
+        table = Vacancy.__table__
+        self.session.execute(
+            update(table).where(table.c.id == bindparam('vacancy_key')),
+            rows
+        )
+
+        vacancy_ids = list(records_by_id)
+        self.session.execute(delete(VacancySkill.__table__).where(VacancySkill.vacancy_id.in_(vacancy_ids)))
+        links = [
+            {'vacancy_id': vacancy_id, 'skill_id': self.skill_ids[name]}
+            for vacancy_id, record in records_by_id.items()
+            for name in record['skills']
+        ]
+        if links:
+            self.session.execute(insert(VacancySkill.__table__).on_conflict_do_nothing(), links)
+
+        self.session.execute(
+            delete(VacancyDescription.__table__).where(VacancyDescription.vacancy_id.in_(vacancy_ids))
+        )
+        if descriptions:
+            self.session.execute(insert(VacancyDescription.__table__), descriptions)
+
+        checked_at = datetime.now()
+        revision = self.next_revision()
+        statement = insert(VacancyFingerprint.__table__)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=['vacancy_id'],
+                set_={'content_hash': statement.excluded.content_hash,
+                      'checked_at': statement.excluded.checked_at,
+                      'is_archived': statement.excluded.is_archived,
+                      'revision': statement.excluded.revision}
+            ),
+            [{'vacancy_id': vacancy_id, 'content_hash': record['content_hash'],
+              'checked_at': checked_at, 'is_archived': False, 'revision': revision}
+             for vacancy_id, record in records_by_id.items()]
+        )
+
+    def mark_checked(self, vacancy_ids, archived=False):
+        if not vacancy_ids:
+            return
+
+        checked_at = datetime.now()
+        statement = insert(VacancyFingerprint.__table__)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=['vacancy_id'],
+                set_={'checked_at': statement.excluded.checked_at,
+                      'is_archived': statement.excluded.is_archived}
+            ),
+            [{'vacancy_id': vacancy_id, 'checked_at': checked_at, 'is_archived': archived}
+             for vacancy_id in vacancy_ids]
+        )
+        if archived:
+            # Снятие с публикации меняет состав подборок, поэтому ревизия растет так же, как при изменении.
+            revision = self.next_revision()
+            table = VacancyFingerprint.__table__
+            for chunk in self.chunks(list(vacancy_ids)):
+                self.session.execute(update(table).where(table.c.vacancy_id.in_(chunk)).values(revision=revision))
+
+    def next_revision(self):
+        # Вызывается после первой записи в транзакции: блокировка записи уже взята,
+        # поэтому ревизии растут в порядке коммитов и подборки не пропускают изменения.
+        current = self.session.execute(select(func.max(VacancyFingerprint.revision))).scalar()
+        return (current or 0) + 1
+
+    def select_stale(self, sources, limit, checked_before):
+        return self.session.execute(
+            select(Vacancy.id, Vacancy.url, Vacancy.source, VacancyFingerprint.content_hash)
+            .outerjoin(VacancyFingerprint, VacancyFingerprint.vacancy_id == Vacancy.id)
+            .where(Vacancy.source.in_(sources))
+            .where(or_(VacancyFingerprint.is_archived.is_(None), VacancyFingerprint.is_archived == False))
+            .where(or_(VacancyFingerprint.checked_at.is_(None), VacancyFingerprint.checked_at < checked_before))
+            .order_by(VacancyFingerprint.checked_at, Vacancy.id)
+            .limit(limit)
+        ).all()
+
+    @classmethod
+    def prepare(cls, record):
+        if 'content_hash' in record:
+            return record
+
+        vacancy = dict(record['vacancy'])
+        description = vacancy.pop('description', None)
+        return dict(
+            record,
+            vacancy=vacancy,
+            content_hash=cls.content_hash(record),
+            description_blob=VacancyDescription.pack(description) if description else None
+        )
+
+    @classmethod
+    def content_hash(cls, record):
+        vacancy = record['vacancy']
+        content = [record['company'], sorted(record['skills'])] + [vacancy.get(field) for field in cls.HASH_FIELDS]
+        return hashlib.sha1(json.dumps(content, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+    def intern(self, model, cache, names):
+        missing = [name for name in names if name not in cache]
+        if not missing:
+            return
+
+        self.session.execute(
+            insert(model.__table__).on_conflict_do_nothing(index_elements=['name']),
+            [{'name': name} for name in missing]
+        )
+        for chunk in self.chunks(missing):
+            cache.update(self.session.execute(
+                select(model.name, model.id).where(model.name.in_(chunk))
+            ).all())
+        self.pending.extend((cache, name) for name in missing)
+
+    def is_batch_due(self):
+        return (len(self.uncommitted_urls) >= self.batch_size
+                or time.monotonic() - self.batch_started_at >= self.batch_seconds)
+
+    def commit_if_due(self):
+        if not self.is_batch_due():
+            return []
+        return self.commit()
+
+    def commit(self):
+        started_at = time.perf_counter()
+        self.session.commit()
+        self.write_seconds += time.perf_counter() - started_at
+        self.session.expunge_all()
+        committed_urls = self.uncommitted_urls
+        self.reset_batch()
+        return committed_urls
+
+    def rollback(self):
+        self.session.rollback()
+        for cache, name in self.pending:
+            cache.pop(name, None)
+        lost_urls = self.uncommitted_urls
+        self.reset_batch()
+        return lost_urls
+
+    def reset_batch(self):
+        self.pending = []
+        self.uncommitted_urls = []
+        self.batch_started_at = time.monotonic()
+
+    def chunks(self, values):
+        for start in range(0, len(values), self.LOOKUP_CHUNK):
+            yield values[start:start + self.LOOKUP_CHUNK]
@@ -0,0 +1,138 @@
+import argparse
+import logging
+import signal
+import threading
+import time
+from datetime import timedelta
+
+from core.connectors import HHConnector, SuperJobConnector
+from core.constants import VacancySource
+from core.crawl_progress import CrawlProgress
+from core.crawler import Crawler, load_template_queries
+from core.database import get_database
+from core.detail_cache import DetailCache
+from core.payload_archive import PayloadArchive
+
+
+logger = logging.getLogger('crawler')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Сбор вакансий без графического интерфейса')
+    parser.add_argument('-q', '--query', action='append', dest='queries',
+                        help='поисковый запрос (можно указать несколько раз); по умолчанию - запросы из шаблонов')
+    parser.add_argument('--interval', type=float, default=0,
+                        help='повторять сбор каждые N минут; 0 - выполнить один раз')
+    parser.add_argument('--full', action='store_true',
+                        help='полный сбор без учета прошлых запусков')
+    parser.add_argument('--overlap', type=float, default=60,
+                        help='перекрытие инкрементального сбора, минут')
+    parser.add_argument('--workers', type=int, default=8, help='параллельных запросов деталей')
+    parser.add_argument('--slices', type=int, default=4, help='параллельно обходимых срезов поиска')
+    parser.add_argument('--commit-every', type=int, default=500, help='вакансий в одной транзакции')
+    parser.add_argument('--pool-size', type=int, default=0,
+                        help='размер пула HTTP-соединений; по умолчанию workers + slices')
+    parser.add_argument('--no-cache', action='store_true', help='не использовать кэш деталей вакансий')
+    parser.add_argument('--no-archive', action='store_true', help='не сохранять ответы API в архив')
+    parser.add_argument('--archive-dir', help='каталог архива ответов API; по умолчанию - data/archive')
+    parser.add_argument('--progress-interval', type=float, default=10,
+                        help='как часто выводить прогресс сбора, секунд')
+    parser.add_argument('--refresh', type=int, default=200,
+                        help='сколько ранее собранных вакансий перепроверить за проход; 0 - не проверять')
+    parser.add_argument('--source', action='append', dest='sources',
+                        choices=[VacancySource.HH, VacancySource.SUPERJOB],
+                        help='источник вакансий (можно указать несколько раз); по умолчанию - hh.ru')
+    parser.add_argument('--superjob-key', help='ключ API SuperJob; по умолчанию - из SUPERJOB_API_KEY')
+    parser.add_argument('--vacuum', action='store_true',
+                        help='сжать файл базы (VACUUM), например после переноса описаний, и выйти')
+    return parser.parse_args()
+
+
+class CrawlScheduler:
+    def __init__(self, args):
+        self.args = args
+        self.db = get_database()
+        self.detail_cache = None if args.no_cache else DetailCache()
+        self.archive = None if args.no_archive else PayloadArchive(args.archive_dir)
+        self.connectors = self.create_connectors(args.sources or [VacancySource.HH])
+        self.crawler = None
+        self.stopped = threading.Event()
+
+    def create_connectors(self, sources):
+        connectors = []
+        if VacancySource.HH in sources:
+            connectors.append(HHConnector(
+                pool_size=self.args.pool_size or self.args.workers + self.args.slices,
+                detail_cache=self.detail_cache
+            ))
+        if VacancySource.SUPERJOB in sources:
+            connectors.append(SuperJobConnector(api_key=self.args.superjob_key))
+        return connectors
+
+    def run_once(self):
+        search_queries = self.args.queries or load_template_queries(self.db)
+        if not search_queries:
+            logger.warning("Нет запросов для сбора: передайте --query или заполните шаблоны")
+            return 0
+
+        self.crawler = Crawler(
+            self.db, search_queries, self.connectors,
+            max_workers=self.args.workers,
+            max_slices=self.args.slices,
+            commit_every=self.args.commit_every,
+            incremental=not self.args.full,
+            overlap=timedelta(minutes=self.args.overlap),
+            refresh_limit=self.args.refresh,
+            on_message=logger.info,
+            on_progress=lambda event: logger.info(CrawlProgress.message(event)),
+            progress_interval=self.args.progress_interval,
+            archive=self.archive
+        )
+        started_at = time.monotonic()
+        count = self.crawler.run()
+        logger.info(f"Сбор завершен за {time.monotonic() - started_at:.0f} с. Добавлено вакансий: {count}")
+        return count
+
+    def run(self):
+        while not self.stopped.is_set():
+            started_at = time.monotonic()
+            self.run_once()
+
+            if self.args.interval <= 0:
+                break
+
+            delay = max(0.0, self.args.interval * 60 - (time.monotonic() - started_at))
+            logger.info(f"Следующий запуск через {delay / 60:.1f} мин.")
+            self.stopped.wait(delay)
+
+        if self.detail_cache:
+            self.detail_cache.close()
+        if self.archive:
+            self.archive.close()
+        for connector in self.connectors:
+            connector.http.close()
+
+    def stop(self, *_):
+        logger.info("Получен сигнал остановки")
+        self.stopped.set()
+        if self.crawler:
+            self.crawler.stop()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    args = parse_args()
+    if args.vacuum:
+        logger.info("Сжатие базы данных...")
+        get_database().vacuum()
+        logger.info("Сжатие завершено")
+        return
+
+    scheduler = CrawlScheduler(args)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    scheduler.run()
+
+
+if __name__ == '__main__':
+    main()
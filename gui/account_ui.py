@@ -4,7 +4,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 from core.models import User
-from core.database import Database
+from core.database import get_database
 import bcrypt
 
 
@@ -13,7 +13,7 @@ class AccountUI(QWidget):
         super().__init__()
         self.user = user
         self.app = app
-        self.db = Database()
+        self.db = get_database()
         self.setup_ui()
         self.load_user_data()
 
@@ -1,229 +1,53 @@
+import os
+
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QTextEdit, QTableWidget,
+    QPushButton, QPlainTextEdit, QTableWidget,
     QTableWidgetItem, QHeaderView, QMessageBox,
     QTabWidget, QListWidget,
-    QListWidgetItem, QInputDialog
+    QListWidgetItem, QInputDialog, QCheckBox, QProgressBar
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from core.database import Database
+from core.database import get_database
 from core.models import Skill, Company, Vacancy, VacancySkill, Template, TemplateVacancy
-import requests
-import time
-from datetime import datetime
+from core.crawler import HHCrawler, load_template_queries
+from core.detail_cache import DetailCache
+from core.payload_archive import PayloadArchive
+from core.connectors import SuperJobConnector
+from core.crawl_progress import CrawlProgress
 
 
 class HHApiParserThread(QThread):
     update_signal = pyqtSignal(str)
+    progress_signal = pyqtSignal(dict)
     finished_signal = pyqtSignal(int)
 
-    def __init__(self, db, search_query):
+    def __init__(self, db, search_queries, **options):
         super().__init__()
-        self.db = Database()
-        self.search_query = search_query
-        self.stop_flag = False
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/json'
-        })
-
-    def process_vacancy(self, session, item):
-        try:
-            if not item or not isinstance(item, dict):
-                self.update_signal.emit("Получена пустая или некорректная вакансия")
-                return False
-
-            vacancy_url = item.get('url')
-            if not vacancy_url:
-                self.update_signal.emit("Вакансия без URL - пропускаем")
-                return False
-
-            if session.query(Vacancy).filter_by(url=vacancy_url).first():
-                return False
-
-            details = self.get_vacancy_details(vacancy_url)
-            if not details:
-                self.update_signal.emit(f"Не удалось получить детали для вакансии: {item.get('name', 'Без названия')}")
-                return False
-
-            employer = item.get('employer', {}) or {}
-            company_name = employer.get('name', "Не указана")
-            company = session.query(Company).filter_by(name=company_name).first()
-            if not company:
-                company = Company(name=company_name)
-                session.add(company)
-                session.flush()
-
-            salary = item.get('salary', {}) or {}
-            salary_from = salary.get('from')
-            salary_to = salary.get('to')
-            salary_currency = salary.get('currency')
-
-            published_at = item.get('published_at')
-            try:
-                publish_date = datetime.strptime(published_at,
-                                                 '%Y-%m-%dT%H:%M:%S%z') if published_at else datetime.now()
-            except:
-                publish_date = datetime.now()
-            area = item.get('area', {}) or {}
-            city = area.get('name')
-
-            employment_type = None
-            employment = item.get('employment', {}) or {}
-            if employment:
-                employment_type = employment.get('name')
-
-            new_vacancy = Vacancy(
-                company_id=company.id,
-                title=item.get('name', 'Без названия'),
-                description=details.get('description', ''),
-                url=vacancy_url,
-                published_date=publish_date,
-                source='hh.ru',
-                salary_min=salary_from,
-                salary_max=salary_to,
-                salary_currency=salary_currency,
-                is_remote=item.get('schedule', {}).get('id') == 'remote',
-                city=city,
-                employment_type=employment_type
-            )
-
-            session.add(new_vacancy)
-            session.flush()
-
-            for skill in details.get('key_skills', []):
-                if not isinstance(skill, dict):
-                    continue
-
-                skill_name = skill.get('name')
-                if not skill_name:
-                    continue
-
-                db_skill = session.query(Skill).filter_by(name=skill_name).first()
-                if not db_skill:
-                    db_skill = Skill(name=skill_name)
-                    session.add(db_skill)
-                    session.flush()
-
-                session.add(VacancySkill(
-                    vacancy_id=new_vacancy.id,
-                    skill_id=db_skill.id
-                ))
-
-            return True
-
-        except Exception as e:
-            self.update_signal.emit(f"Критическая ошибка обработки вакансии: {str(e)}")
-            return False
-
-    def get_vacancy_details(self, vacancy_url):
-        try:
-            if 'hh.ru/vacancy/' in vacancy_url:
-                vacancy_id = vacancy_url.split('/')[-1].split('?')[0]
-                vacancy_url = f"https://api.hh.ru/vacancies/{vacancy_id}"
-
-            for attempt in range(3):
-                try:
-                    response = self.session.get(vacancy_url, timeout=(3.05, 10))
-
-                    if response.status_code == 404:
-                        return None
-                    elif response.status_code == 403:
-                        time.sleep(2 ** attempt)
-                        continue
-                    elif not response.ok:
-                        return None
-
-                    data = response.json()
-
-                    if not data or not isinstance(data, dict):
-                        return None
-
-                    return {
-                        'description': data.get('description', '')[:15000],
-                        'key_skills': data.get('key_skills', []) or []
-                    }
-
-                except requests.exceptions.RequestException as e:
-                    if attempt == 2:
-                        raise
-                    time.sleep(1)
-
-            return None
-
-        except Exception as e:
-            self.update_signal.emit(f"Critical error in details: {str(e)}")
-            return None
+        self.crawler = HHCrawler(
+            db, search_queries,
+            on_message=self.update_signal.emit,
+            on_progress=self.progress_signal.emit,
+            **options
+        )
 
     def run(self):
-        session = None
-        try:
-            session = self.db.get_session()
-            vacancies_count = 0
-            page = 0
-            pages = 1
-
-            while not self.stop_flag and page < pages:
-                try:
-                    search_query_encoded = requests.utils.quote(self.search_query)
-                    url = f"https://api.hh.ru/vacancies?text={search_query_encoded}&area=1&page={page}&per_page=50"
-
-                    response = self.session.get(url, timeout=10)
-
-                    if response.status_code != 200:
-                        self.update_signal.emit(f"Ошибка API: {response.status_code}")
-                        break
-
-                    try:
-                        data = response.json()
-                        pages = data.get('pages', 1)
-                        found = data.get('found', 0)
-                        items = data.get('items', []) or []
-
-                        self.update_signal.emit(f"Страница {page + 1}/{pages}. Найдено: {found}")
-
-                        for item in items:
-                            if self.stop_flag:
-                                break
-
-                            if self.process_vacancy(session, item):
-                                vacancies_count += 1
-                                self.update_signal.emit(f"Успешно добавлена: {item.get('name', 'Без названия')}")
-
-                    except ValueError as e:
-                        self.update_signal.emit(f"Ошибка парсинга JSON: {str(e)}")
-                        break
-
-                    page += 1
-                    time.sleep(0.5)
-
-                except requests.exceptions.RequestException as e:
-                    self.update_signal.emit(f"Ошибка сети: {str(e)}")
-                    break
-                except Exception as e:
-                    self.update_signal.emit(f"Ошибка обработки страницы: {str(e)}")
-                    break
-
-        except Exception as e:
-            self.update_signal.emit(f"Критическая ошибка: {str(e)}")
-        finally:
-            if session:
-                session.commit()
-                session.close()
-            self.finished_signal.emit(vacancies_count)
+        self.finished_signal.emit(self.crawler.run())
 
     def stop(self):
-        self.stop_flag = True
+        self.crawler.stop()
 
 
 class AdminPanel(QWidget):
+    LOG_LIMIT = 2000
+
     def __init__(self, app):
         super().__init__()
         self.app = app
-        self.db = Database()
-        self.db.create_tables()
+        self.db = get_database()
         self.parser_thread = None
+        self.detail_cache = None
+        self.payload_archive = None
         self.current_template_id = None
         self.setup_ui()
 
@@ -250,11 +74,27 @@ class AdminPanel(QWidget):
         self.stop_btn.clicked.connect(self.stop_parsing)
         self.stop_btn.setEnabled(False)
 
+        self.incremental_checkbox = QCheckBox("Только новые вакансии с прошлого сбора")
+        self.incremental_checkbox.setChecked(True)
+
+        self.superjob_checkbox = QCheckBox("Также SuperJob")
+        if not os.environ.get(SuperJobConnector.API_KEY_ENV):
+            self.superjob_checkbox.setEnabled(False)
+            self.superjob_checkbox.setToolTip("Укажите ключ API в переменной окружения SUPERJOB_API_KEY")
+
         buttons_layout.addWidget(self.start_btn)
         buttons_layout.addWidget(self.stop_btn)
+        buttons_layout.addWidget(self.incremental_checkbox)
+        buttons_layout.addWidget(self.superjob_checkbox)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("%v из %m")
+        self.progress_label = QLabel()
+        self.progress_label.setWordWrap(True)
 
-        self.log_output = QTextEdit()
+        self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
+        self.log_output.setMaximumBlockCount(self.LOG_LIMIT)
         self.log_output.setStyleSheet("font-family: monospace;")
 
         self.vacancies_table = QTableWidget()
@@ -264,6 +104,8 @@ class AdminPanel(QWidget):
         self.vacancies_table.setEditTriggers(QTableWidget.NoEditTriggers)
 
         layout.addLayout(buttons_layout)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.progress_label)
         layout.addWidget(QLabel("Лог выполнения:"))
         layout.addWidget(self.log_output)
         layout.addWidget(QLabel("Последние добавленные вакансии:"))
@@ -436,36 +278,35 @@ class AdminPanel(QWidget):
     def start_parsing_by_templates(self):
         session = self.db.get_session()
         try:
-            templates = session.query(Template).all()
-            if not templates:
+            if not session.query(Template).count():
                 QMessageBox.warning(self, "Ошибка", "Нет шаблонов для сбора данных")
                 return
-
-            search_queries = []
-            for template in templates:
-                vacancies = session.query(TemplateVacancy).filter_by(template_id=template.id).all()
-                for vac in vacancies:
-                    if vac.vacancy_query not in search_queries:
-                        search_queries.append(vac.vacancy_query)
-
-            if not search_queries:
-                QMessageBox.warning(self, "Ошибка", "В шаблонах нет вакансий для сбора")
-                return
-
-            self.start_btn.setEnabled(False)
-            self.stop_btn.setEnabled(True)
-            self.log_output.clear()
-
-            search_query = " OR ".join(f'"{q}"' for q in search_queries)
-
-            self.parser_thread = HHApiParserThread(self.db, search_query)
-            self.parser_thread.update_signal.connect(self.update_log)
-            self.parser_thread.finished_signal.connect(self.parsing_finished)
-            self.parser_thread.start()
-
         finally:
             session.close()
 
+        search_queries = load_template_queries(self.db)
+        if not search_queries:
+            QMessageBox.warning(self, "Ошибка", "В шаблонах нет вакансий для сбора")
+            return
+
+        self.start_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.log_output.clear()
+        self.progress_bar.reset()
+        self.progress_label.clear()
+
+        self.parser_thread = HHApiParserThread(
+            self.db, search_queries,
+            detail_cache=self.get_detail_cache(),
+            archive=self.get_payload_archive(),
+            incremental=self.incremental_checkbox.isChecked(),
+            connectors=self.get_extra_connectors()
+        )
+        self.parser_thread.update_signal.connect(self.update_log)
+        self.parser_thread.progress_signal.connect(self.update_progress)
+        self.parser_thread.finished_signal.connect(self.parsing_finished)
+        self.parser_thread.start()
+
     def start_parsing(self):
         search_query = self.search_input.text().strip()
         if not search_query:
@@ -475,14 +316,43 @@ class AdminPanel(QWidget):
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.log_output.clear()
-
-        self.parser_thread = HHApiParserThread(self.db, search_query)
+        self.progress_bar.reset()
+        self.progress_label.clear()
+
+        self.parser_thread = HHApiParserThread(
+            self.db, [search_query],
+            detail_cache=self.get_detail_cache(),
+            archive=self.get_payload_archive(),
+            incremental=self.incremental_checkbox.isChecked(),
+            connectors=self.get_extra_connectors()
+        )
         self.parser_thread.update_signal.connect(self.update_log)
+        self.parser_thread.progress_signal.connect(self.update_progress)
         self.parser_thread.finished_signal.connect(self.parsing_finished)
         self.parser_thread.start()
 
+    def get_extra_connectors(self):
+        if self.superjob_checkbox.isChecked():
+            return [SuperJobConnector()]
+        return []
+
+    def get_payload_archive(self):
+        if self.payload_archive is None:
+            self.payload_archive = PayloadArchive()
+        return self.payload_archive
+
+    def get_detail_cache(self):
+        if self.detail_cache is None:
+            self.detail_cache = DetailCache()
+        return self.detail_cache
+
     def update_log(self, message):
-        self.log_output.append(message)
+        self.log_output.appendPlainText(message)
+
+    def update_progress(self, event):
+        self.progress_bar.setMaximum(max(event['found'], event['received'], 1))
+        self.progress_bar.setValue(event['received'])
+        self.progress_label.setText(CrawlProgress.message(event))
 
     def parsing_finished(self, count):
         self.start_btn.setEnabled(True)
@@ -2,24 +2,79 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QCheckBox, QPushButton, QGroupBox, QComboBox,
     QDateEdit, QSpinBox, QMessageBox, QScrollArea,
-    QFormLayout, QFrame
+    QFormLayout, QFrame, QProgressBar
 )
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import Qt, QDate, QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 from datetime import datetime
-from core.database import UserDatabase
-from core.models import Template, TemplateVacancy, Vacancy, Company, Skill, VacancySkill, Analysis, AnalysisSkill
-from core.constants import EmploymentType
-from collections import defaultdict
+from core.analysis_builder import AnalysisBuilder
+from core.database import get_user_database
+from core.models import Template, TemplateVacancy, Vacancy, Analysis
+from core.constants import VacancySource
+from core.vacancy_copier import VacancyCopier
+
+
+class CollectionWorker(QThread):
+    progress_signal = pyqtSignal(dict)
+
+    def __init__(self):
+        super().__init__()
+        self.stop_flag = False
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self.work()
+        except Exception as e:
+            self.error = str(e)
+
+    def work(self):
+        raise NotImplementedError
+
+    def is_stopped(self):
+        return self.stop_flag
+
+    def stop(self):
+        self.stop_flag = True
+
+
+class CopyVacanciesThread(CollectionWorker):
+    def __init__(self, main_db, user_db, search_queries, filters):
+        super().__init__()
+        self.search_queries = search_queries
+        self.filters = filters
+        self.copier = VacancyCopier(
+            main_db, user_db,
+            on_progress=self.progress_signal.emit,
+            stop_check=self.is_stopped
+        )
+
+    def work(self):
+        return self.copier.copy(self.search_queries, self.filters)
+
+
+class BuildAnalysisThread(CollectionWorker):
+    def __init__(self, user_db, user_id, template):
+        super().__init__()
+        self.builder = AnalysisBuilder(
+            user_db, user_id, template,
+            on_progress=self.progress_signal.emit,
+            stop_check=self.is_stopped
+        )
+
+    def work(self):
+        return self.builder.build()
 
 
 class CollectionUI(QWidget):
     def __init__(self, main_db, user_id):
         super().__init__()
         self.main_db = main_db
-        self.user_db = UserDatabase(user_id)
+        self.user_db = get_user_database(user_id)
         self.user_id = user_id
         self.parent_window = None
+        self.worker = None
         self.setup_ui()
         self.load_templates()
 
@@ -173,13 +228,29 @@ class CollectionUI(QWidget):
         self.view_btn.clicked.connect(self.view_results)
         self.view_btn.setEnabled(False)
 
+        self.cancel_btn = QPushButton("Отменить")
+        self.cancel_btn.setStyleSheet(
+            "QPushButton { padding: 10px; background-color: #f44336; color: white; }"
+            "QPushButton:disabled { background-color: #cccccc; }"
+        )
+        self.cancel_btn.clicked.connect(self.cancel_worker)
+        self.cancel_btn.setEnabled(False)
+
         buttons_layout.addWidget(self.start_btn)
         buttons_layout.addWidget(self.reports_btn)
         buttons_layout.addWidget(self.view_btn)
+        buttons_layout.addWidget(self.cancel_btn)
         buttons_layout.addStretch()
         buttons_frame.setLayout(buttons_layout)
         content_layout.addWidget(buttons_frame)
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.progress_label = QLabel()
+        self.progress_label.setVisible(False)
+        content_layout.addWidget(self.progress_bar)
+        content_layout.addWidget(self.progress_label)
+
         content_layout.addStretch()
         content.setLayout(content_layout)
         scroll.setWidget(content)
@@ -187,89 +258,83 @@ class CollectionUI(QWidget):
         self.setLayout(main_layout)
 
     def generate_reports(self):
-        session = None
+        session = self.user_db.get_session()
         try:
-            session = self.user_db.get_session()
-
             vacancy_count = session.query(Vacancy).count()
-            if vacancy_count == 0:
-                QMessageBox.warning(self, "Нет данных", "Нет вакансий для анализа")
-                return False
+        finally:
+            session.close()
 
-            analysis_name = f"Анализ от {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            new_analysis = Analysis(
-                user_id=self.user_id,
-                name=analysis_name,
-                template=self.template_combo.currentText(),
-                created_at=datetime.now(),
-                total_vacancies=vacancy_count
-            )
-            session.add(new_analysis)
-            session.flush()
-
-            skill_stats = defaultdict(lambda: {
-                'count': 0,
-                'min_salaries': [],
-                'max_salaries': [],
-                'avg_salaries': [],
-                'skill_id': None
-            })
-
-            vacancies = session.query(Vacancy).all()
-
-            for vacancy in vacancies:
-                for skill in vacancy.skills:
-                    stats = skill_stats[skill.name]
-                    stats['count'] += 1
-                    stats['skill_id'] = skill.id
-
-                    if vacancy.salary_min:
-                        stats['min_salaries'].append(vacancy.salary_min)
-                    if vacancy.salary_max:
-                        stats['max_salaries'].append(vacancy.salary_max)
-                    if vacancy.salary_min and vacancy.salary_max:
-                        avg = (vacancy.salary_min + vacancy.salary_max) / 2
-                        stats['avg_salaries'].append(avg)
-
-            for skill_name, data in skill_stats.items():
-                if not data['skill_id']:
-                    continue
-
-                min_salary = min(data['min_salaries']) if data['min_salaries'] else None
-                max_salary = max(data['max_salaries']) if data['max_salaries'] else None
-                avg_salary = sum(data['avg_salaries']) / len(data['avg_salaries']) if data['avg_salaries'] else None
-                frequency = (data['count'] / vacancy_count) * 100
-
-                analysis_skill = AnalysisSkill(
-                    analysis_id=new_analysis.id,
-                    skill_id=data['skill_id'],
-                    vacancy_count=data['count'],
-                    frequency=frequency,
-                    min_salary=min_salary,
-                    max_salary=max_salary,
-                    avg_salary=avg_salary
-                )
-                session.add(analysis_skill)
+        if vacancy_count == 0:
+            QMessageBox.warning(self, "Нет данных", "Нет вакансий для анализа")
+            return False
 
-            session.commit()
+        worker = BuildAnalysisThread(self.user_db, self.user_id, self.template_combo.currentText())
+        self.start_worker(worker, "Формирование отчета...", self.reports_finished)
+        return True
 
-            if self.parent_window:
-                self.parent_window.reports_ui.load_last_analysis()
-                self.parent_window.visualization_ui.load_analyses()
-                self.parent_window.export_ui.load_analyses()
-                self.parent_window.navigate_to_reports()
+    def reports_finished(self, worker):
+        if worker.result is None:
+            self.progress_label.setText("Формирование отчета отменено")
+            return
 
-            QMessageBox.information(self, "Успех", "Новый анализ успешно создан!")
-            return True
+        if self.parent_window:
+            self.parent_window.reports_ui.load_last_analysis()
+            self.parent_window.visualization_ui.load_analyses()
+            self.parent_window.export_ui.load_analyses()
+            self.parent_window.navigate_to_reports()
 
-        except Exception as e:
-            if session:
-                session.rollback()
-            QMessageBox.critical(self, "Ошибка", f"Ошибка при создании анализа: {str(e)}")
-            return False
+        QMessageBox.information(self, "Успех", "Новый анализ успешно создан!")
+
+    def start_worker(self, worker, message, on_finished):
+        self.worker = worker
+        # QThread.finished приходит после выхода из run(), поэтому поток можно отпускать без риска.
+        self.worker.progress_signal.connect(self.update_progress)
+        self.worker.finished.connect(lambda: self.worker_finished(worker, on_finished))
+
+        self.start_btn.setEnabled(False)
+        self.reports_btn.setEnabled(False)
+        self.view_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.progress_bar.reset()
+        self.progress_bar.setVisible(True)
+        self.progress_label.setText(message)
+        self.progress_label.setVisible(True)
+        self.worker.start()
+
+    def update_progress(self, event):
+        self.progress_bar.setMaximum(max(event['total'], 1))
+        self.progress_bar.setValue(event['done'])
+        self.progress_label.setText(f"{event['stage']}...")
+
+    def cancel_worker(self):
+        if self.worker and self.worker.isRunning():
+            self.worker.stop()
+            self.cancel_btn.setEnabled(False)
+            self.progress_label.setText("Отмена...")
+
+    def worker_finished(self, worker, on_finished):
+        if self.worker is worker:
+            self.worker = None
+        self.start_btn.setEnabled(True)
+        self.reports_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        self.progress_bar.setVisible(False)
+        session = self.user_db.get_session()
+        try:
+            self.view_btn.setEnabled(session.query(Vacancy).count() > 0)
         finally:
-            if session:
-                session.close()
+            session.close()
+
+        if worker.error:
+            self.progress_label.setText("")
+            QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при обработке данных:\n{worker.error}")
+            return
+        on_finished(worker)
+
+    def stop_workers(self):
+        if self.worker and self.worker.isRunning():
+            self.worker.stop()
+            self.worker.wait()
 
     def load_templates(self):
         session = self.main_db.get_session()
@@ -316,26 +381,34 @@ class CollectionUI(QWidget):
             return
 
         filters = self.get_current_filters()
+        if not filters['sources']:
+            QMessageBox.warning(self, "Ошибка", "Не выбран ни один источник вакансий")
+            return
 
         search_queries = self.get_template_queries(template_id)
         if not search_queries:
             QMessageBox.warning(self, "Ошибка", "Выбранный шаблон не содержит запросов")
             return
 
-        try:
-            copied_count = self.copy_vacancies(search_queries, filters)
-
-            msg = QMessageBox()
-            msg.setIcon(QMessageBox.Information)
-            msg.setWindowTitle("Сбор завершен")
-            msg.setText(f"Собрано {copied_count} вакансий по выбранным параметрам")
-            msg.setDetailedText(f"Использованы запросы: {', '.join(search_queries)}")
-            msg.exec_()
+        worker = CopyVacanciesThread(self.main_db, self.user_db, search_queries, filters)
+        self.start_worker(worker, "Сбор данных...", self.collection_finished)
 
-            self.view_btn.setEnabled(copied_count > 0)
+    def collection_finished(self, worker):
+        result = worker.result
+        if result is None:
+            self.progress_label.setText("Сбор данных отменен, подборка не изменилась")
+            return
 
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при сборе данных:\n{str(e)}")
+        self.progress_label.setText("")
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Information)
+        msg.setWindowTitle("Сбор завершен")
+        msg.setText(f"Собрано {result['total']} вакансий по выбранным параметрам")
+        msg.setDetailedText(
+            f"Использованы запросы: {', '.join(worker.search_queries)}\n"
+            f"Добавлено или обновлено: {result['updated']}, удалено: {result['removed']}"
+        )
+        msg.exec_()
 
     def get_current_filters(self):
         return {
@@ -348,7 +421,12 @@ class CollectionUI(QWidget):
             'fulltime': self.fulltime_check.isChecked(),
             'parttime': self.parttime_check.isChecked(),
             'project': self.project_check.isChecked(),
-            'remote': self.remote_check.isChecked()
+            'remote': self.remote_check.isChecked(),
+            'sources': [source for source, checkbox in (
+                (VacancySource.HH, self.hh_checkbox),
+                (VacancySource.SUPERJOB, self.sj_checkbox),
+                (VacancySource.RABOTA, self.rabota_checkbox)
+            ) if checkbox.isChecked()]
         }
 
     def get_template_queries(self, template_id):
@@ -362,153 +440,6 @@ class CollectionUI(QWidget):
         finally:
             session.close()
 
-    def copy_vacancies(self, search_queries, filters):
-        from sqlalchemy import or_, and_
-
-        main_session = self.main_db.get_session()
-        user_session = self.user_db.get_session()
-        copied_count = 0
-
-        try:
-
-            user_session.query(Vacancy).delete()
-            user_session.query(VacancySkill).delete()
-            user_session.commit()
-
-            query = main_session.query(Vacancy).join(Company)
-
-            if search_queries:
-                query = query.filter(
-                    or_(*[Vacancy.title.ilike(f'%{q}%') for q in search_queries])
-                )
-
-            if filters['date_from']:
-                query = query.filter(Vacancy.published_date >= filters['date_from'])
-            if filters['date_to']:
-                query = query.filter(Vacancy.published_date <= filters['date_to'])
-
-            if filters['salary_min']:
-                query = query.filter(
-                    or_(
-                        Vacancy.salary_min >= filters['salary_min'],
-                        Vacancy.salary_min == None
-                    )
-                )
-            if filters['salary_max']:
-                query = query.filter(
-                    or_(
-                        Vacancy.salary_max <= filters['salary_max'],
-                        Vacancy.salary_max == None
-                    )
-                )
-
-            if filters['salary_currency']:
-                if filters['salary_currency'] == 'RUR':
-                    query = query.filter(
-                        or_(
-                            Vacancy.salary_currency == 'RUR',
-                            Vacancy.salary_currency == 'RUB',
-                            Vacancy.salary_currency == None
-                        )
-                    )
-                else:
-                    query = query.filter(
-                        or_(
-                            Vacancy.salary_currency == filters['salary_currency'],
-                            Vacancy.salary_currency == None
-                        )
-                    )
-
-            if filters.get('remote'):
-                query = query.filter(
-                    or_(
-                        Vacancy.is_remote == True,
-                        Vacancy.is_remote == None
-                    )
-                )
-
-            employment_filters = []
-            if filters.get('fulltime'):
-                employment_filters.append(
-                    or_(
-                        Vacancy.employment_type == EmploymentType.FULL,
-                        Vacancy.employment_type == None
-                    )
-                )
-            if filters.get('parttime'):
-                employment_filters.append(
-                    or_(
-                        Vacancy.employment_type == EmploymentType.PART,
-                        Vacancy.employment_type == None
-                    )
-                )
-            if filters.get('project'):
-                employment_filters.append(
-                    or_(
-                        Vacancy.employment_type == EmploymentType.PROJECT,
-                        Vacancy.employment_type == None
-                    )
-                )
-
-            if employment_filters:
-                query = query.filter(or_(*employment_filters))
-
-            vacancies = query.order_by(Vacancy.published_date.desc()).all()
-
-            for vacancy in vacancies:
-                company = user_session.query(Company) \
-                    .filter_by(name=vacancy.company.name) \
-                    .first()
-
-                if not company:
-                    company = Company(name=vacancy.company.name)
-                    user_session.add(company)
-                    user_session.flush()
-
-                new_vacancy = Vacancy(
-                    company_id=company.id,
-                    title=vacancy.title,
-                    description=vacancy.description,
-                    url=vacancy.url,
-                    published_date=vacancy.published_date,
-                    source=vacancy.source,
-                    salary_min=vacancy.salary_min,
-                    salary_max=vacancy.salary_max,
-                    salary_currency=vacancy.salary_currency,
-                    is_remote=vacancy.is_remote,
-                    employment_type=vacancy.employment_type,
-                    city=vacancy.city
-                )
-                user_session.add(new_vacancy)
-                user_session.flush()
-
-                for skill in vacancy.skills:
-                    db_skill = user_session.query(Skill) \
-                        .filter_by(name=skill.name) \
-                        .first()
-
-                    if not db_skill:
-                        db_skill = Skill(name=skill.name)
-                        user_session.add(db_skill)
-                        user_session.flush()
-
-                    user_session.add(VacancySkill(
-                        vacancy_id=new_vacancy.id,
-                        skill_id=db_skill.id
-                    ))
-
-                copied_count += 1
-
-            user_session.commit()
-            return copied_count
-
-        except Exception as e:
-            user_session.rollback()
-            raise e
-        finally:
-            main_session.close()
-            user_session.close()
-
     def save_analysis(self, search_queries, filters, vacancy_count):
         session = self.user_db.get_session()
         try:
@@ -9,7 +9,7 @@ from gui.reports_ui import ReportsUI
 from gui.visualization_ui import VisualizationUI
 from gui.export_ui import ExportUI
 from gui.account_ui import AccountUI
-from core.database import Database, UserDatabase
+from core.database import get_database, get_user_database
 
 
 class MainWindow(QWidget):
@@ -17,8 +17,8 @@ class MainWindow(QWidget):
         super().__init__()
         self.app = app
         self.user_id = app.current_user.id if app.current_user else None
-        self.user_db = UserDatabase(self.user_id)
-        self.db = Database()
+        self.user_db = get_user_database(self.user_id)
+        self.db = get_database()
         self.current_active_button = None
         self.setup_ui()
 
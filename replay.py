@@ -0,0 +1,41 @@
+import argparse
+import logging
+import time
+
+from core.archive_replay import ArchiveReplay
+from core.database import get_database
+from core.payload_archive import PayloadArchive
+
+
+logger = logging.getLogger('replay')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Восстановление базы вакансий из архива ответов API без сети')
+    parser.add_argument('--archive', help='каталог архива; по умолчанию - data/archive')
+    parser.add_argument('--db', help='путь к базе вакансий; по умолчанию - основная база')
+    parser.add_argument('--batch', type=int, default=2000, help='вакансий в одной транзакции')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='процессов разбора; по умолчанию - по числу ядер')
+    return parser.parse_args()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    args = parse_args()
+    archive_path = args.archive or PayloadArchive().path
+
+    started_at = time.monotonic()
+    replay = ArchiveReplay(get_database(args.db), archive_path, args.batch, args.workers, on_message=logger.info)
+    added = replay.run()
+    elapsed = time.monotonic() - started_at
+    logger.info(
+        f"Восстановление завершено за {elapsed:.0f} с ({replay.entries_count / max(elapsed, 1e-9):.0f} записей/с, "
+        f"процессов: {replay.workers}, запись в БД: {replay.write_seconds:.1f} с). "
+        f"Записей архива: {replay.entries_count}, добавлено вакансий: {added}, "
+        f"пропущено некорректных: {replay.skipped_count}"
+    )
+
+
+if __name__ == '__main__':
+    main()
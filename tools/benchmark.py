@@ -0,0 +1,138 @@
+import argparse
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from core.crawler import HHCrawler
+from core.database import Database
+from core.rate_limiter import AdaptiveRateLimiter
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def int_list(value):
+    return [int(part) for part in value.split(',') if part]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Замер пропускной способности сборщика на локальной имитации hh.ru')
+    parser.add_argument('--size', type=int, default=5000, help='размер синтетического корпуса')
+    parser.add_argument('--query', action='append', dest='queries', help='поисковые запросы (по умолчанию Python, Java, Аналитик)')
+    parser.add_argument('--workers', type=int_list, default=[1, 8], help='варианты числа потоков деталей, через запятую')
+    parser.add_argument('--slices', type=int_list, default=[4], help='варианты числа параллельных срезов')
+    parser.add_argument('--commit-every', type=int_list, default=[500], help='варианты размера транзакции')
+    parser.add_argument('--rate', type=float, default=200.0, help='предельная частота запросов ограничителя, в секунду')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--rps-limit', type=float, default=0.0)
+    parser.add_argument('--verbose', action='store_true', help='выводить лог сборщика')
+    return parser.parse_args()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(args):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'tools.mock_hh_api', '--port', str(port), '--size', str(args.size),
+         '--latency', str(args.latency), '--error-rate', str(args.error_rate),
+         '--throttle-rate', str(args.throttle_rate), '--rps-limit', str(args.rps_limit)],
+        cwd=ROOT_DIR
+    )
+    api_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(f"{api_url}/__stats", timeout=1).read()
+            return process, api_url
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("Не удалось запустить имитацию API")
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Имитация API не ответила вовремя")
+
+
+def server_stats(api_url):
+    return json.loads(urllib.request.urlopen(f"{api_url}/__stats", timeout=5).read())
+
+
+def run_config(args, api_url, queries, workers, slices, commit_every):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'vacancies.db'))
+        rate_limiter = AdaptiveRateLimiter(rate=args.rate, max_rate=args.rate, burst=max(4, workers))
+        crawler = HHCrawler(
+            db, queries,
+            max_workers=workers,
+            max_slices=slices,
+            rate_limiter=rate_limiter,
+            commit_every=commit_every,
+            incremental=False,
+            api_url=api_url,
+            on_message=print if args.verbose else (lambda message: None)
+        )
+
+        started_at = time.perf_counter()
+        count = crawler.run()
+        elapsed = time.perf_counter() - started_at
+        db.engine.dispose()
+
+    stats = rate_limiter.stats()
+    http_stats = crawler.http.stats()
+    crawler.http.close()
+    return {
+        'workers': workers,
+        'slices': slices,
+        'commit_every': commit_every,
+        'vacancies': count,
+        'seconds': elapsed,
+        'vacancies_per_second': count / elapsed if elapsed else 0.0,
+        'requests_per_second': stats['requests'] / elapsed if elapsed else 0.0,
+        'write_seconds': crawler.write_seconds,
+        'rejections': sum(stats['rejections'].values()),
+        'wire_megabytes': http_stats['wire_bytes'] / 1024 / 1024,
+        'reuse_ratio': http_stats['reuse_ratio']
+    }
+
+
+def print_results(results):
+    header = f"{'workers':>7} {'slices':>6} {'commit':>6} {'vacancies':>9} {'time, s':>8} " \
+             f"{'vac/s':>8} {'req/s':>8} {'db write, s':>11} {'rejected':>8} {'wire, MB':>8} {'reuse':>6}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        print(f"{result['workers']:>7} {result['slices']:>6} {result['commit_every']:>6} "
+              f"{result['vacancies']:>9} {result['seconds']:>8.2f} {result['vacancies_per_second']:>8.1f} "
+              f"{result['requests_per_second']:>8.1f} {result['write_seconds']:>11.2f} {result['rejections']:>8} "
+              f"{result['wire_megabytes']:>8.2f} {result['reuse_ratio'] * 100:>5.0f}%")
+
+
+def main():
+    args = parse_args()
+    queries = args.queries or ['Python', 'Java', 'Аналитик']
+
+    process, api_url = start_mock_server(args)
+    try:
+        results = []
+        for workers, slices, commit_every in itertools.product(args.workers, args.slices, args.commit_every):
+            results.append(run_config(args, api_url, queries, workers, slices, commit_every))
+        print_results(results)
+        print(f"\nЗапросов к имитации API: {server_stats(api_url)}")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+import argparse
+import gzip
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+TITLES = [
+    'Python разработчик', 'Java Developer', 'Data Scientist', 'Frontend разработчик',
+    'DevOps инженер', 'Аналитик данных', 'QA инженер', 'Go разработчик',
+    'Системный администратор', 'Product Manager', 'C++ программист', 'Android разработчик'
+]
+LEVELS = ['Junior', 'Middle', 'Senior', 'Lead', 'Стажер']
+SKILLS = [
+    'Python', 'Django', 'SQL', 'PostgreSQL', 'Git', 'Docker', 'Linux', 'Java', 'Spring',
+    'JavaScript', 'React', 'TypeScript', 'Kubernetes', 'Pandas', 'Machine Learning',
+    'Go', 'C++', 'Kotlin', 'REST API', 'Английский язык', 'Agile', 'Redis', 'Kafka'
+]
+CITIES = ['Москва', 'Санкт-Петербург', 'Новосибирск', 'Казань', 'Екатеринбург']
+EMPLOYMENTS = [('full', 'Полная занятость'), ('part', 'Частичная занятость'), ('project', 'Проектная работа')]
+SCHEDULES = [('fullDay', 'Полный день'), ('remote', 'Удаленная работа'), ('flexible', 'Гибкий график')]
+
+
+class MockCorpus:
+    def __init__(self, size, seed=1, days=30, base_url='http://127.0.0.1:8800'):
+        rng = random.Random(seed)
+        now = datetime.now().replace(microsecond=0)
+        self.base_url = base_url
+        self.items = []
+        self.details = {}
+
+        for index in range(size):
+            vacancy_id = str(10_000_000 + index)
+            published = now - timedelta(seconds=rng.randint(0, days * 86400))
+            salary_from = rng.choice([None, rng.randrange(30_000, 300_000, 5_000)])
+            employment = rng.choice(EMPLOYMENTS)
+            schedule = rng.choice(SCHEDULES)
+            self.items.append({
+                'id': vacancy_id,
+                'name': f"{rng.choice(LEVELS)} {rng.choice(TITLES)}",
+                'url': f"{base_url}/vacancies/{vacancy_id}?host=hh.ru",
+                'alternate_url': f"https://hh.ru/vacancy/{vacancy_id}",
+                'employer': {'id': str(rng.randrange(size // 10 + 1)), 'name': f"Компания {rng.randrange(size // 10 + 1)}"},
+                'salary': {
+                    'from': salary_from,
+                    'to': salary_from + rng.randrange(0, 100_000, 5_000) if salary_from else None,
+                    'currency': rng.choice(['RUR', 'RUR', 'RUR', 'USD', 'EUR']),
+                    'gross': rng.random() < 0.5
+                },
+                'published_at': published.strftime('%Y-%m-%dT%H:%M:%S+0300'),
+                'area': {'name': rng.choice(CITIES)},
+                'employment': {'id': employment[0], 'name': employment[1]},
+                'schedule': {'id': schedule[0], 'name': schedule[1]},
+                '_published': published
+            })
+            self.details[vacancy_id] = {
+                'seed': rng.randrange(1 << 30),
+                'skills': rng.sample(SKILLS, rng.randint(0, 8))
+            }
+
+        self.items.sort(key=lambda item: item['_published'], reverse=True)
+        self.items_by_id = {item['id']: item for item in self.items}
+
+    @lru_cache(maxsize=256)
+    def search(self, text, date_from, date_to):
+        words = [word for word in text.lower().replace('"', ' ').split() if word != 'or']
+        date_from = datetime.strptime(date_from, '%Y-%m-%dT%H:%M:%S') if date_from else None
+        date_to = datetime.strptime(date_to, '%Y-%m-%dT%H:%M:%S') if date_to else None
+
+        matched = []
+        for item in self.items:
+            name = item['name'].lower()
+            if words and not any(word in name for word in words):
+                continue
+            if date_from and item['_published'] < date_from:
+                continue
+            if date_to and item['_published'] > date_to:
+                continue
+            matched.append(item)
+        return matched
+
+    def detail(self, vacancy_id):
+        item = self.items_by_id.get(vacancy_id)
+        meta = self.details.get(vacancy_id)
+        if not item or not meta:
+            return None
+
+        rng = random.Random(meta['seed'])
+        paragraphs = rng.randint(3, 40)
+        description = ''.join(
+            f"<p>{' '.join(rng.choice(SKILLS) for _ in range(rng.randint(10, 40)))}</p>"
+            for _ in range(paragraphs)
+        )
+        detail = {key: value for key, value in item.items() if not key.startswith('_')}
+        detail.update({
+            'description': description,
+            'key_skills': [{'name': name} for name in meta['skills']],
+            'experience': {'id': 'between1And3', 'name': 'От 1 года до 3 лет'},
+            'archived': False
+        })
+        return detail
+
+
+class MockSettings:
+    def __init__(self, latency=0.05, jitter=0.5, error_rate=0.0, throttle_rate=0.0,
+                 rps_limit=0.0, retry_after=1, search_cap=2000):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rps_limit = rps_limit
+        self.retry_after = retry_after
+        self.search_cap = search_cap
+
+
+class MockHHServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, corpus, settings):
+        super().__init__(address, MockHHHandler)
+        self.corpus = corpus
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.window_started = time.monotonic()
+        self.window_requests = 0
+        self.stats = {'requests': 0, 'search': 0, 'details': 0, 'errors': 0, 'throttled': 0}
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def over_rps_limit(self):
+        if not self.settings.rps_limit:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_started >= 1.0:
+                self.window_started = now
+                self.window_requests = 0
+            self.window_requests += 1
+            return self.window_requests > self.settings.rps_limit
+
+
+class MockHHHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        settings = server.settings
+
+        parsed = urlparse(self.path)
+        if parsed.path == '/__stats':
+            return self.send_json(200, server.stats)
+
+        server.count('requests')
+        if settings.latency:
+            time.sleep(max(0.0, random.gauss(settings.latency, settings.latency * settings.jitter)))
+
+        if server.over_rps_limit() or random.random() < settings.throttle_rate:
+            server.count('throttled')
+            status = random.choice([403, 429])
+            return self.send_json(status, {'errors': [{'type': 'captcha_required' if status == 403 else 'too_many_requests'}]},
+                                  {'Retry-After': str(settings.retry_after)})
+
+        if random.random() < settings.error_rate:
+            server.count('errors')
+            return self.send_json(502, {'errors': [{'type': 'bad_gateway'}]})
+
+        parts = [part for part in parsed.path.split('/') if part]
+        if parts == ['vacancies']:
+            server.count('search')
+            return self.search(parse_qs(parsed.query))
+        if len(parts) == 2 and parts[0] == 'vacancies':
+            server.count('details')
+            return self.detail(parts[1])
+
+        self.send_json(404, {'errors': [{'type': 'not_found'}]})
+
+    def search(self, query):
+        def param(name, default=None):
+            return query.get(name, [default])[0]
+
+        per_page = min(100, int(param('per_page', 20)))
+        page = int(param('page', 0))
+        cap = self.server.settings.search_cap
+        if per_page * (page + 1) > cap and page > 0:
+            return self.send_json(400, {'errors': [{'type': 'bad_argument', 'value': 'page'}]})
+
+        matched = self.server.corpus.search(param('text', ''), param('date_from'), param('date_to'))
+        reachable = matched[:cap]
+        items = reachable[page * per_page:(page + 1) * per_page]
+        self.send_json(200, {
+            'found': len(matched),
+            'pages': math.ceil(len(reachable) / per_page) if per_page else 0,
+            'page': page,
+            'per_page': per_page,
+            'items': [{key: value for key, value in item.items() if not key.startswith('_')} for item in items]
+        })
+
+    def detail(self, vacancy_id):
+        etag = f'"{vacancy_id}"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.send_json(304, None, {'ETag': etag})
+
+        detail = self.server.corpus.detail(vacancy_id)
+        if not detail:
+            return self.send_json(404, {'errors': [{'type': 'not_found'}]})
+        self.send_json(200, detail, {'ETag': etag})
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8') if data is not None else b''
+        compress = len(body) > 1024 and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if compress:
+            body = gzip.compress(body, compresslevel=5)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Локальная имитация API hh.ru для нагрузочных тестов')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--size', type=int, default=20000, help='размер синтетического корпуса')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.05, help='средняя задержка ответа, с')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля ответов 502')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='доля случайных ответов 403/429')
+    parser.add_argument('--rps-limit', type=float, default=0.0, help='ограничение запросов в секунду (429 сверх него)')
+    parser.add_argument('--retry-after', type=int, default=1, help='значение заголовка Retry-After')
+    return parser.parse_args()
+
+
+def create_server(host='127.0.0.1', port=8800, size=20000, seed=1, **settings):
+    corpus = MockCorpus(size, seed, base_url=f"http://{host}:{port}")
+    return MockHHServer((host, port), corpus, MockSettings(**settings))
+
+
+def main():
+    args = parse_args()
+    server = create_server(
+        args.host, args.port, args.size, args.seed,
+        latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        rps_limit=args.rps_limit, retry_after=args.retry_after
+    )
+    print(f"Mock hh.ru API: http://{args.host}:{args.port} ({args.size} вакансий)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()